@@ -0,0 +1,178 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+
+from board import Board
+from generator import DIFFICULTIES, generate_batch
+from rating import rate_puzzle
+
+
+# Заголовок: сигнатура, версия, размер записи, число записей
+HEADER = struct.Struct('<8sIIQ')
+MAGIC = b'SDKBANK\0'
+VERSION = 1
+# Запись: упакованные головоломка и решение, сложность, оценка * 100
+RECORD = struct.Struct('<41s41sBH')
+INDEX_ITEM = struct.Struct('<I')
+
+
+class BankRecord:
+    """Запись банка головоломок"""
+
+    __slots__ = ('puzzle', 'solution', 'difficulty', 'rating')
+
+    def __init__(self, puzzle, solution, difficulty, rating):
+        self.puzzle = puzzle
+        self.solution = solution
+        self.difficulty = difficulty
+        self.rating = rating
+
+    def __repr__(self):
+        return (f"BankRecord({self.puzzle.to_string()!r}, "
+                f"difficulty={self.difficulty!r}, rating={self.rating})")
+
+
+class PuzzleBank:
+    """Банк готовых головоломок в файле с записями фиксированного размера.
+
+    Рядом с файлом данных для каждой сложности лежит индекс
+    <path>.<сложность>.idx - массив номеров записей. Файлы читаются
+    через mmap, поэтому случайная головоломка достается за O(1) без
+    загрузки банка в память. Новые записи дописываются в конец.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0))
+
+        self._data = open(path, 'r+b')
+        magic, version, record_size, count = HEADER.unpack(self._data.read(HEADER.size))
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self._data.close()
+            raise ValueError(f"Файл не является банком головоломок: {path}")
+        self._count = count
+        self._indexes = {difficulty: open(self._index_path(difficulty), 'a+b')
+                         for difficulty in DIFFICULTIES}
+        self._counts = {difficulty: os.fstat(index.fileno()).st_size // INDEX_ITEM.size
+                        for difficulty, index in self._indexes.items()}
+        self._maps = {}
+
+    @classmethod
+    def open_existing(cls, path):
+        """Открывает банк, если файл есть, иначе None"""
+        return cls(path) if os.path.exists(path) else None
+
+    def _index_path(self, difficulty):
+        return f"{self.path}.{difficulty}.idx"
+
+    def __len__(self):
+        return self._count
+
+    def count(self, difficulty):
+        """Число головоломок заданной сложности"""
+        return self._counts[difficulty]
+
+    def append(self, puzzle, solution, difficulty, rating=0.0):
+        """Дописывает головоломку (доски - Board или списки списков)"""
+        if difficulty not in DIFFICULTIES:
+            raise ValueError(f"Недопустимая сложность: {difficulty}")
+        if not isinstance(puzzle, Board):
+            puzzle = Board.from_lists(puzzle)
+        if not isinstance(solution, Board):
+            solution = Board.from_lists(solution)
+
+        record = RECORD.pack(puzzle.to_packed(), solution.to_packed(),
+                             DIFFICULTIES.index(difficulty),
+                             min(int(round(rating * 100)), 0xFFFF))
+        self._data.seek(HEADER.size + self._count * RECORD.size)
+        self._data.write(record)
+        index = self._indexes[difficulty]
+        index.seek(0, os.SEEK_END)
+        index.write(INDEX_ITEM.pack(self._count))
+
+        self._counts[difficulty] += 1
+        self._count += 1
+        self._data.seek(0)
+        self._data.write(HEADER.pack(MAGIC, VERSION, RECORD.size, self._count))
+        # Отображения устарели: файлы выросли
+        self._close_maps()
+
+    def flush(self):
+        """Сбрасывает записанное на диск"""
+        self._data.flush()
+        for index in self._indexes.values():
+            index.flush()
+
+    def _map(self, key, f):
+        """mmap файла только для чтения (создается при первом обращении)"""
+        view = self._maps.get(key)
+        if view is None:
+            f.flush()
+            view = self._maps[key] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return view
+
+    def _close_maps(self):
+        for view in self._maps.values():
+            view.close()
+        self._maps.clear()
+
+    def record(self, number):
+        """Запись с заданным номером"""
+        if not 0 <= number < self._count:
+            raise IndexError(f"Нет записи с номером {number}")
+        data = self._map(None, self._data)
+        puzzle, solution, difficulty, rating = RECORD.unpack_from(
+            data, HEADER.size + number * RECORD.size)
+        return BankRecord(Board.from_packed(puzzle), Board.from_packed(solution),
+                          DIFFICULTIES[difficulty], rating / 100)
+
+    def draw(self, difficulty, rng=random):
+        """Случайная запись заданной сложности или None, если их нет"""
+        total = self.count(difficulty)
+        if total == 0:
+            return None
+        index = self._map(difficulty, self._indexes[difficulty])
+        number, = INDEX_ITEM.unpack_from(index, rng.randrange(total) * INDEX_ITEM.size)
+        return self.record(number)
+
+    def close(self):
+        """Закрывает файлы банка"""
+        self._close_maps()
+        self._data.close()
+        for index in self._indexes.values():
+            index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def main(argv=None):
+    """Офлайн-наполнение банка: python bank.py puzzles.bank -n 1000 -d hard"""
+    parser = argparse.ArgumentParser(description="Наполнение банка головоломок")
+    parser.add_argument('path', help="файл банка")
+    parser.add_argument('-n', '--count', type=int, default=100,
+                        help="количество головоломок")
+    parser.add_argument('-d', '--difficulty', choices=DIFFICULTIES,
+                        default='medium', help="сложность")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="число процессов (по умолчанию - число ядер)")
+    args = parser.parse_args(argv)
+
+    with PuzzleBank(args.path) as bank:
+        for puzzle, solution in generate_batch(args.count, args.difficulty,
+                                               workers=args.workers, rated=True):
+            bank.append(puzzle, solution, args.difficulty,
+                        rate_puzzle(puzzle).rating)
+        print(f"{args.difficulty}: {bank.count(args.difficulty)} головоломок, "
+              f"всего {len(bank)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+from board import Board
+from generator import DIFFICULTIES, SudokuGenerator
+from timing import percentile
+
+
+BENCH_VERSION = 1
+
+# Фиксированный набор сложных головоломок для проверки единственности:
+# "самая сложная" Инкалы, AI Escargot, головоломка из 17 подсказок
+# и семь головоломок сложности 'hard' с оценкой не ниже 3.0
+HARD_CORPUS = (
+    "800000000003600000070090200050007000000045700000100030001000068008500010090000400",
+    "100007090030020008009600500005300900010080002600004000300000010040000007007000300",
+    "000000010400000000020000000000050407008000300001090000300400200050100000000806000",
+    "000004050007000380000020019356001000000250000800930400520010900700000000004000000",
+    "090000002004503006018000000040010607000036008800000200000080000020000090000729005",
+    "009806070500000204000000003600085000070003009020400000080207030001000000700000080",
+    "040050000020000910000709000007000060000600800006200430000040020500070000130000075",
+    "300008020207100894010000000000050007700001000008403000004000006000200000503000700",
+    "000003001900000080183006000000000009000000670210600000028004300500089000000250800",
+    "070030000090060530100020040000500090000204008000810002000050010005000709809000000",
+)
+
+# Число повторов каждого замера
+RUNS = {
+    'generate_full_board': 200,
+    'has_unique_solution': 20,
+    'create_puzzle_easy': 50,
+    'create_puzzle_medium': 30,
+    'create_puzzle_hard': 10,
+}
+
+
+def summarize(samples):
+    """Задержки в миллисекундах и пропускная способность"""
+    total = sum(samples)
+    return {
+        'runs': len(samples),
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p95_ms': percentile(samples, 95) * 1000,
+        'p99_ms': percentile(samples, 99) * 1000,
+        'mean_ms': total / len(samples) * 1000,
+        'per_second': len(samples) / total if total else float('inf'),
+    }
+
+
+def _timed(func, runs, rng, seed):
+    """Время каждого из runs вызовов func(i) при фиксированном зерне rng"""
+    rng.seed(seed)
+    samples = []
+    for i in range(runs):
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run_benchmarks(scale=1.0, seed=12345, **options):
+    """Запускает все замеры; options передаются в SudokuGenerator"""
+    corpus = [Board.from_string(text).to_lists() for text in HARD_CORPUS]
+
+    def runs(name):
+        return max(1, int(RUNS[name] * scale))
+
+    with SudokuGenerator(**options) as generator:
+        results = {}
+        results['generate_full_board'] = summarize(_timed(
+            lambda i: generator.generate_full_board(),
+            runs('generate_full_board'), generator.rng, seed))
+
+        def unique(i):
+            board = corpus[i % len(corpus)]
+            if not generator.has_unique_solution(board):
+                raise AssertionError(f"Головоломка {i % len(corpus)} из набора не единственна")
+        results['has_unique_solution'] = summarize(_timed(
+            unique, runs('has_unique_solution') * len(corpus), generator.rng, seed))
+
+        for difficulty in DIFFICULTIES:
+            name = f'create_puzzle_{difficulty}'
+            results[name] = summarize(_timed(
+                lambda i: generator.create_puzzle(difficulty), runs(name),
+                generator.rng, seed))
+        return results
+
+
+def check_options(baseline, options):
+    """ValueError, если базовые замеры сняты не с параметрами генератора options"""
+    if baseline.get('options') != options:
+        raise ValueError(f"Базовые замеры сняты с другими параметрами: "
+                         f"{baseline.get('options')}, сейчас {options}")
+
+
+def compare(results, baseline, tolerance, options=None):
+    """Замеры, медиана которых хуже базовой больше чем на tolerance процентов.
+
+    options - параметры генератора текущих замеров; с базовыми,
+    снятыми с другими, сравнение бессмысленно (check_options).
+    """
+    if options is not None:
+        check_options(baseline, options)
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            continue
+        limit = base['p50_ms'] * (1 + tolerance / 100)
+        if stats['p50_ms'] > limit:
+            regressions.append((name, base['p50_ms'], stats['p50_ms']))
+    return regressions
+
+
+def main(argv=None):
+    """Замеры производительности генератора и решателя"""
+    parser = argparse.ArgumentParser(description="Замеры производительности Судоку")
+    parser.add_argument('--output', metavar='PATH',
+                        help="записать результаты в JSON")
+    parser.add_argument('--baseline', metavar='PATH',
+                        help="сравнить с базовыми результатами из JSON")
+    parser.add_argument('--tolerance', type=float, default=20.0,
+                        help="допустимое замедление медианы, проценты")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="множитель числа повторов")
+    parser.add_argument('--seed', type=int, default=12345)
+    parser.add_argument('--backend', choices=SudokuGenerator.BACKENDS,
+                        default='backtracking')
+    parser.add_argument('--search', choices=SudokuGenerator.SEARCH_MODES,
+                        default='mrv')
+    parser.add_argument('--check-workers', type=int, default=1,
+                        help="процессов для проверок единственности одной головоломки")
+    args = parser.parse_args(argv)
+
+    options = {'backend': args.backend, 'search': args.search,
+               'check_workers': args.check_workers}
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        # Несовпадение параметров видно до замеров, а не после
+        try:
+            check_options(baseline, options)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+
+    results = run_benchmarks(args.scale, args.seed, **options)
+    report = {
+        'version': BENCH_VERSION,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': args.seed,
+        'options': options,
+        'results': results,
+    }
+
+    print(f"{'замер':<24}{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}{'в секунду':>12}")
+    for name, stats in results.items():
+        print(f"{name:<24}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+              f"{stats['p99_ms']:>10.2f}{stats['per_second']:>12.1f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance, options)
+        for name, base, current in regressions:
+            print(f"Замедление {name}: {base:.2f} мс -> {current:.2f} мс",
+                  file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+from math import isqrt
+
+
+# Символы клеток в строке доски: 0 - пустая, 10..25 - буквы A..P
+ALPHABET = b'0123456789ABCDEFGHIJKLMNOP'
+# Таблицы bytes.translate: число клетки <-> ASCII-символ
+# (неизвестные символы превращаются в 0xFF)
+_TO_ASCII = ALPHABET + bytes(256 - len(ALPHABET))
+_FROM_ASCII = bytearray(b'\xff' * 256)
+for _value, _char in enumerate(ALPHABET):
+    _FROM_ASCII[_char] = _value
+    _FROM_ASCII[ord(chr(_char).lower())] = _value
+_FROM_ASCII = bytes(_FROM_ASCII)
+
+# Битовые маски: бит num отвечает за цифру num (1..9)
+FULL_MASK = 0b1111111110
+MASK_DIGITS = [tuple(num for num in range(1, 10) if mask >> num & 1)
+               for mask in range(1 << 10)]
+# Считает и бит 0: rating применяет таблицу и к маскам позиций в единице
+POPCOUNT = [mask.bit_count() for mask in range(1 << 10)]
+
+
+def _diagonals(box):
+    """Две главные диагонали (X-судоку)"""
+    size = box * box
+    return [tuple(i * size + i for i in range(size)),
+            tuple(i * size + size - 1 - i for i in range(size))]
+
+
+def _windows(box):
+    """Дополнительные квадраты виндоку: с отступом в клетку от краев
+    и друг от друга (на доске 9x9 - четыре квадрата)"""
+    size = box * box
+    starts = range(1, size - box + 1, box + 1)
+    return [tuple((top + i) * size + left + j for i in range(box) for j in range(box))
+            for top in starts for left in starts]
+
+
+# Варианты правил: функция, дающая дополнительные единицы по размеру квадрата
+VARIANTS = {
+    'standard': None,
+    'x': _diagonals,
+    'windoku': _windows,
+}
+
+
+class BoardShape:
+    """Геометрия доски N²×N²: единицы (строки, столбцы, области и
+    дополнительные единицы варианта), числа 1..box².
+
+    Правила описываются данными: области по умолчанию - квадраты
+    box×box, у пазл-судоку (jigsaw) - произвольные, а варианты добавляют
+    свои единицы (диагонали X-судоку, квадраты виндоку). Все это один
+    раз сводится к таблицам: единицы клетки (cell_units), соседи
+    (peers), номер области (box_of) и дополнительные единицы клетки
+    (extra_of, None у доски без них), поэтому перебор работает с любым
+    вариантом без отдельного кода.
+    """
+
+    _cache = {}
+
+    def __init__(self, box, regions=None, extra_units=(), name='standard'):
+        if not 2 <= box <= 5:
+            raise ValueError(f"Недопустимый размер квадрата: {box}")
+        self.box = box
+        self.name = name
+        self.size = size = box * box
+        self.cells = size * size
+        # Бит num отвечает за число num (1..size)
+        self.full_mask = ((1 << size) - 1) << 1
+
+        # Единицы над номерами клеток: строки, столбцы, области
+        rows = [tuple(row * size + col for col in range(size)) for row in range(size)]
+        cols = [tuple(row * size + col for row in range(size)) for col in range(size)]
+        if regions is None:
+            regions = [tuple((b // box * box + i // box) * size + b % box * box + i % box
+                             for i in range(size))
+                       for b in range(size)]
+        regions = [tuple(region) for region in regions]
+        if (len(regions) != size or any(len(region) != size for region in regions) or
+                sorted(cell for region in regions for cell in region) != list(range(self.cells))):
+            raise ValueError(f"Области должны разбивать доску на {size} частей по {size} клеток")
+        self.regions = regions
+        self.extra_units = [tuple(unit) for unit in extra_units]
+        self.units = rows + cols + regions + self.extra_units
+
+        region_of = [0] * self.cells
+        for index, region in enumerate(regions):
+            for cell in region:
+                region_of[cell] = index
+        self.box_of = [region_of[row * size:(row + 1) * size] for row in range(size)]
+        # Номера дополнительных единиц клетки (среди extra_units)
+        extra_of = [[] for _ in range(self.cells)]
+        for index, unit in enumerate(self.extra_units):
+            for cell in unit:
+                extra_of[cell].append(index)
+        self.extra_of = ([[tuple(extra_of[row * size + col]) for col in range(size)]
+                          for row in range(size)]
+                         if self.extra_units else None)
+
+        # Номера единиц клетки: строка, size + столбец, 2 * size + область,
+        # затем дополнительные
+        self.cell_units = [(cell // size, size + cell % size, 2 * size + region_of[cell]) +
+                           tuple(3 * size + index for index in extra_of[cell])
+                           for cell in range(self.cells)]
+        self.peers = [tuple(sorted({peer for unit in self.cell_units[cell]
+                                    for peer in self.units[unit]} - {cell}))
+                      for cell in range(self.cells)]
+
+    @property
+    def standard(self):
+        """Обычные правила: квадратные области без дополнительных единиц"""
+        return self.name == 'standard'
+
+    @classmethod
+    def of(cls, box):
+        """Общий экземпляр геометрии для заданного размера квадрата"""
+        return cls.variant('standard', box)
+
+    @classmethod
+    def for_size(cls, size):
+        """Геометрия по стороне доски (4, 9, 16, 25)"""
+        box = isqrt(size)
+        if box * box != size:
+            raise ValueError(f"Сторона доски должна быть квадратом, получено {size}")
+        return cls.of(box)
+
+    @classmethod
+    def variant(cls, name, box=3):
+        """Общий экземпляр геометрии варианта из VARIANTS"""
+        key = (name, box)
+        shape = cls._cache.get(key)
+        if shape is None:
+            if name not in VARIANTS:
+                raise ValueError(f"Неизвестный вариант: {name}")
+            units = VARIANTS[name]
+            shape = cls._cache[key] = cls(box, extra_units=units(box) if units else (),
+                                          name=name)
+        return shape
+
+    @classmethod
+    def jigsaw(cls, layout):
+        """Пазл-судоку: layout - строка из size² символов, одинаковые
+        символы обозначают одну область"""
+        layout = ''.join(layout.split())
+        key = ('jigsaw', layout)
+        shape = cls._cache.get(key)
+        if shape is None:
+            labels = sorted(set(layout))
+            regions = [tuple(cell for cell, char in enumerate(layout) if char == label)
+                       for label in labels]
+            shape = cls(isqrt(len(regions)), regions, name='jigsaw')
+            if len(layout) != shape.cells:
+                raise ValueError(f"Разметка должна содержать {shape.cells} символов")
+            shape.layout = layout
+            cls._cache[key] = shape
+        return shape
+
+    def __reduce__(self):
+        # Процессы пула получают тот же общий экземпляр, а не копию
+        if self.name == 'jigsaw':
+            return BoardShape.jigsaw, (self.layout,)
+        return BoardShape.variant, (self.name, self.box)
+
+    def __repr__(self):
+        if self.standard:
+            return f"BoardShape({self.box})"
+        if self.name == 'jigsaw':
+            return f"BoardShape.jigsaw({self.layout!r})"
+        return f"BoardShape.variant({self.name!r}, {self.box})"
+
+
+class Board:
+    """Компактная доска: по байту на клетку (0 - пустая), по умолчанию 9x9"""
+
+    __slots__ = ('cells', 'shape')
+
+    def __init__(self, cells=None, box=3, shape=None):
+        self.shape = shape = shape or BoardShape.of(box)
+        if cells is None:
+            self.cells = bytearray(shape.cells)
+        else:
+            if len(cells) != shape.cells:
+                raise ValueError(f"Доска должна содержать {shape.cells} клеток, "
+                                 f"получено {len(cells)}")
+            self.cells = bytearray(cells)
+
+    @property
+    def size(self):
+        """Сторона доски"""
+        return self.shape.size
+
+    @classmethod
+    def from_lists(cls, rows, shape=None):
+        """Доска из списка списков (размер определяется по числу строк,
+        вариант правил задается shape)"""
+        shape = shape or BoardShape.for_size(len(rows))
+        return cls(bytes(num for row in rows for num in row), shape=shape)
+
+    @classmethod
+    def from_string(cls, text, shape=None):
+        """Доска из строки в size² символов ('0' или '.' - пустая клетка).
+
+        Числа больше 9 записываются буквами: A - 10, B - 11 и т.д.
+        shape задает вариант правил.
+        """
+        text = text.strip().replace('.', '0')
+        size = isqrt(len(text))
+        if size * size != len(text) or size not in (4, 9, 16, 25) or not text.isascii():
+            raise ValueError(f"Некорректная строка доски: {text!r}")
+        cells = text.encode('ascii').translate(_FROM_ASCII)
+        if max(cells) > size:
+            raise ValueError(f"Некорректная строка доски: {text!r}")
+        return cls(cells, isqrt(size), shape)
+
+    @classmethod
+    def from_packed(cls, data):
+        """Доска 9x9 из 41 байта упакованных полубайтов (см. to_packed)"""
+        cells = bytearray(82)
+        cells[0::2] = bytes(byte >> 4 for byte in data)
+        cells[1::2] = bytes(byte & 0x0F for byte in data)
+        return cls(cells[:81])
+
+    def to_packed(self):
+        """Доска 9x9 в 41 байте: по полубайту на клетку"""
+        if self.shape is not BoardShape.of(3):
+            raise ValueError("Упакованный формат есть только у обычной доски 9x9")
+        cells = self.cells + b'\0'
+        return bytes(high << 4 | low for high, low in zip(cells[0::2], cells[1::2]))
+
+    def to_lists(self):
+        """Доска в виде списка списков"""
+        cells, size = self.cells, self.shape.size
+        return [list(cells[i:i + size]) for i in range(0, len(cells), size)]
+
+    def to_string(self):
+        """Доска в виде строки, по символу на клетку (0 - пустая клетка)"""
+        return self.cells.translate(_TO_ASCII).decode('ascii')
+
+    def copy(self):
+        """Копия доски (одно копирование массива клеток)"""
+        return Board(self.cells, shape=self.shape)
+
+    def __getitem__(self, pos):
+        row, col = pos
+        return self.cells[row * self.shape.size + col]
+
+    def __setitem__(self, pos, num):
+        row, col = pos
+        self.cells[row * self.shape.size + col] = num
+
+    def count_empty(self):
+        """Количество пустых клеток"""
+        return self.cells.count(0)
+
+    def __eq__(self, other):
+        if not isinstance(other, Board):
+            return NotImplemented
+        return self.shape is other.shape and self.cells == other.cells
+
+    __hash__ = None
+
+    def __bytes__(self):
+        return bytes(self.cells)
+
+    def __repr__(self):
+        return f"Board({self.to_string()!r})"
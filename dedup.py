@@ -0,0 +1,139 @@
+import hashlib
+import mmap
+import os
+import struct
+
+from symmetry import canonical_key
+
+
+# Заголовок: сигнатура, версия, емкость (степень двойки), число записей
+HEADER = struct.Struct('<8sIIQQ')
+MAGIC = b'SDKDEDUP'
+VERSION = 1
+SLOT_SIZE = 8
+MAX_LOAD = 0.7
+
+
+def fingerprint(key):
+    """64-битный отпечаток канонической строки (0 зарезервирован под пустой слот)"""
+    digest = hashlib.blake2b(key.encode('ascii'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+class DedupIndex:
+    """Множество головоломок на диске с точностью до симметрий.
+
+    Файл - хеш-таблица с открытой адресацией из 64-битных отпечатков
+    канонических форм. Файл отображается в память через mmap, так что
+    проверка и вставка стоят O(1) и не требуют чтения всего файла.
+    Когда таблица заполнена больше чем на MAX_LOAD, она перестраивается
+    в файл вдвое большего размера.
+    """
+
+    def __init__(self, path, capacity=1 << 16):
+        if capacity & (capacity - 1):
+            raise ValueError(f"Емкость должна быть степенью двойки: {capacity}")
+        self.path = path
+        if not os.path.exists(path):
+            self._create(path, capacity)
+        self._open()
+
+    @staticmethod
+    def _create(path, capacity):
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, capacity, 0))
+            f.truncate(HEADER.size + capacity * SLOT_SIZE)
+
+    def _open(self):
+        self._file = open(self.path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, version, _, capacity, count = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self._close_map()
+            raise ValueError(f"Файл не является индексом дубликатов: {self.path}")
+        self.capacity = capacity
+        self._count = count
+        self._slots = memoryview(self._map)[HEADER.size:].cast('Q')
+
+    def _close_map(self):
+        if getattr(self, '_slots', None) is not None:
+            self._slots.release()
+            self._slots = None
+        self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, board):
+        return self.contains_key(canonical_key(board))
+
+    def add(self, board):
+        """Добавляет головоломку; False, если равносильная уже есть"""
+        return self.add_key(canonical_key(board))
+
+    def contains_key(self, key):
+        """Есть ли каноническая форма в индексе"""
+        value = fingerprint(key)
+        return self._slots[self._probe(value)] == value
+
+    def add_key(self, key):
+        """Добавляет каноническую форму; False, если она уже есть"""
+        value = fingerprint(key)
+        slot = self._probe(value)
+        if self._slots[slot] == value:
+            return False
+        self._slots[slot] = value
+        self._count += 1
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, 0, self.capacity, self._count)
+        if self._count > self.capacity * MAX_LOAD:
+            self._grow()
+        return True
+
+    def _probe(self, value):
+        """Слот со значением value или первый пустой слот (линейное пробирование)"""
+        slots = self._slots
+        mask = self.capacity - 1
+        slot = value & mask
+        while True:
+            current = slots[slot]
+            if current == value or current == 0:
+                return slot
+            slot = (slot + 1) & mask
+
+    def _grow(self):
+        """Перестраивает таблицу в файл вдвое большего размера"""
+        old_slots = self._slots.tolist()
+        capacity = self.capacity * 2
+        tmp_path = self.path + '.tmp'
+        self._create(tmp_path, capacity)
+        with open(tmp_path, 'r+b') as f, mmap.mmap(f.fileno(), 0) as new_map:
+            slots = memoryview(new_map)[HEADER.size:].cast('Q')
+            mask = capacity - 1
+            for value in old_slots:
+                if value:
+                    slot = value & mask
+                    while slots[slot]:
+                        slot = (slot + 1) & mask
+                    slots[slot] = value
+            slots.release()
+            HEADER.pack_into(new_map, 0, MAGIC, VERSION, 0, capacity, self._count)
+        self._close_map()
+        os.replace(tmp_path, self.path)
+        self._open()
+
+    def flush(self):
+        """Сбрасывает изменения на диск"""
+        self._map.flush()
+
+    def close(self):
+        """Закрывает индекс"""
+        if self._slots is not None:
+            self.flush()
+            self._close_map()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
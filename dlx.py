@@ -0,0 +1,197 @@
+import random
+
+
+class DancingLinks:
+    """Матрица точного покрытия на танцующих ссылках (Algorithm X)"""
+
+    def __init__(self, column_count, rows):
+        # Узел 0 - корень, узлы 1..column_count - заголовки столбцов
+        size = column_count + 1
+        self.left = [i - 1 for i in range(size)]
+        self.right = [i + 1 for i in range(size)]
+        self.left[0] = column_count
+        self.right[column_count] = 0
+        self.up = list(range(size))
+        self.down = list(range(size))
+        self.column = list(range(size))
+        self.row_of = [-1] * size
+        self.sizes = [0] * size
+        self.row_nodes = []
+        # Счетчик узлов перебора (накапливается между вызовами)
+        self.nodes = 0
+
+        for row_id, columns in enumerate(rows):
+            first = len(self.column)
+            self.row_nodes.append(first)
+            for offset, col in enumerate(columns):
+                header = col + 1
+                node = first + offset
+                self.left.append(node - 1 if offset else first + len(columns) - 1)
+                self.right.append(node + 1 if offset < len(columns) - 1 else first)
+                self.up.append(self.up[header])
+                self.down.append(header)
+                self.down[self.up[header]] = node
+                self.up[header] = node
+                self.column.append(header)
+                self.row_of.append(row_id)
+                self.sizes[header] += 1
+
+    def cover(self, col):
+        """Исключает столбец и все пересекающие его строки"""
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, sizes = self.column, self.sizes
+        right[left[col]] = right[col]
+        left[right[col]] = left[col]
+        i = down[col]
+        while i != col:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                sizes[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, col):
+        """Возвращает столбец, исключенный cover"""
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, sizes = self.column, self.sizes
+        i = up[col]
+        while i != col:
+            j = left[i]
+            while j != i:
+                sizes[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[col]] = col
+        left[right[col]] = col
+
+    def select(self, row_id):
+        """Включает строку в решение; False, если она конфликтует с уже выбранными"""
+        first = self.row_nodes[row_id]
+        node = first
+        while True:
+            col = self.column[node]
+            if self.right[self.left[col]] != col:
+                return False
+            node = self.right[node]
+            if node == first:
+                break
+        while True:
+            self.cover(self.column[node])
+            node = self.right[node]
+            if node == first:
+                return True
+
+    def deselect(self, row_id):
+        """Отменяет select (в обратном порядке выбора)"""
+        first = self.row_nodes[row_id]
+        node = self.left[first]
+        while True:
+            self.uncover(self.column[node])
+            if node == first:
+                return
+            node = self.left[node]
+
+    def search(self, shuffle=False, rng=random):
+        """Генератор точных покрытий: выдает список номеров строк.
+
+        Пока генератор не закрыт, матрица остается частично покрытой.
+        При shuffle порядок строк перемешивается генератором rng.
+        """
+        yield from self._search([], rng.shuffle if shuffle else None)
+
+    def _search(self, solution, shuffle):
+        """Рекурсивный шаг Algorithm X"""
+        self.nodes += 1
+        right, down, sizes = self.right, self.down, self.sizes
+        col = right[0]
+        if col == 0:
+            yield solution
+            return
+
+        # Столбец с наименьшим числом строк
+        best = col
+        while col != 0:
+            if sizes[col] < sizes[best]:
+                best = col
+                if sizes[col] <= 1:
+                    break
+            col = right[col]
+        if sizes[best] == 0:
+            return
+
+        candidates = []
+        node = down[best]
+        while node != best:
+            candidates.append(node)
+            node = down[node]
+        if shuffle is not None:
+            shuffle(candidates)
+
+        self.cover(best)
+        try:
+            for node in candidates:
+                solution.append(self.row_of[node])
+                j = right[node]
+                while j != node:
+                    self.cover(self.column[j])
+                    j = right[j]
+                try:
+                    yield from self._search(solution, shuffle)
+                finally:
+                    j = self.left[node]
+                    while j != node:
+                        self.uncover(self.column[j])
+                        j = self.left[j]
+                    solution.pop()
+        finally:
+            self.uncover(best)
+
+
+class SudokuExactCover:
+    """Судоку 9x9 как задача точного покрытия.
+
+    Строка матрицы - тройка (строка, столбец, число), столбцы - четыре
+    группы ограничений: клетка, число в строке, в столбце и в квадрате.
+    Матрица строится один раз и переиспользуется для всех досок.
+    """
+
+    def __init__(self):
+        rows = []
+        for row in range(9):
+            for col in range(9):
+                box = row // 3 * 3 + col // 3
+                for num in range(9):
+                    rows.append((row * 9 + col,
+                                 81 + row * 9 + num,
+                                 162 + col * 9 + num,
+                                 243 + box * 9 + num))
+        self.links = DancingLinks(324, rows)
+
+    @property
+    def nodes(self):
+        return self.links.nodes
+
+    def solutions(self, board, shuffle=False, rng=random):
+        """Генератор решений: выдает список (строка, столбец, число) для пустых клеток"""
+        links = self.links
+        selected = []
+        try:
+            for row in range(9):
+                for col in range(9):
+                    num = board[row][col]
+                    if num != 0:
+                        row_id = (row * 9 + col) * 9 + num - 1
+                        if not links.select(row_id):
+                            return
+                        selected.append(row_id)
+
+            for rows in links.search(shuffle, rng):
+                yield [(row_id // 81, row_id // 9 % 9, row_id % 9 + 1)
+                       for row_id in rows]
+        finally:
+            for row_id in reversed(selected):
+                links.deselect(row_id)
@@ -1,5 +1,17 @@
+import argparse
+import os
 import random
 import sys
+import time
+import weakref
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import closing
+
+from board import MASK_DIGITS, POPCOUNT, VARIANTS, Board, BoardShape
+from dedup import DedupIndex
+from dlx import SudokuExactCover
+from rating import UNSOLVED_RATING, rate_puzzle
+from symmetry import canonical_key, equivalent_puzzles
 
 
 class SudokuError(Exception):
@@ -12,129 +24,1075 @@ class GenerationError(SudokuError):
     pass
 
 
-def create_puzzle(self, difficulty='medium'):
-    """Создает головоломку заданной сложности"""
-    if difficulty not in ['easy', 'medium', 'hard']:
-        raise ValueError(f"Недопустимая сложность: {difficulty}")
+class _BudgetExhausted(Exception):
+    """Бюджет create_puzzle исчерпан посреди перебора"""
 
-    try:
-        self.generate_full_board()
-        if not self.is_valid_board(self.board):
-            raise GenerationError("Сгенерирована невалидная доска")
 
-        solution = [row[:] for row in self.board]
-        # ... остальной код
+# Версия алгоритма генерации: увеличивается при любом изменении, после
+# которого то же зерно дает другую головоломку (входит в идентификатор)
+GENERATOR_VERSION = 1
 
-    except Exception as e:
-        raise GenerationError(f"Ошибка при создании головоломки: {str(e)}")
+DIFFICULTIES = ('easy', 'medium', 'hard')
+CELLS_TO_REMOVE = {'easy': 40, 'medium': 50, 'hard': 60}
+# Доля убираемых клеток для досок 16x16 и 25x25: с долей как у 9x9
+# проверки единственности становятся слишком долгими. Доска 4x4
+# использует долю 9x9
+REMOVE_SHARE = {
+    4: {'easy': 0.45, 'medium': 0.5, 'hard': 0.55},
+    5: {'easy': 0.4, 'medium': 0.44, 'hard': 0.48},
+}
+# Целевое число подсказок минимальной головоломки по умолчанию
+MINIMAL_CLUES = 22
+# Клеток в одной задаче проверок наперед и оценка расходов главного
+# процесса на задачу (отправка, сериализация, прием ответа), секунды
+CHECK_BATCH = 8
+TASK_OVERHEAD = 0.0002
+# Узлов перебора до первого перезапуска заполнения доски варианта правил
+# и на все попытки вместе
+RESTART_NODES = 200
+FILL_NODE_LIMIT = 100000
+# Диапазоны оценки rate_puzzle для сложностей: легкая решается скрытыми
+# одиночками, средняя - одиночками и пересечениями, сложная требует пар,
+# X-wing и более сильных приемов
+RATING_RANGES = {
+    'easy': (0.0, 1.5),
+    'medium': (2.3, 2.8),
+    'hard': (3.0, UNSOLVED_RATING),
+}
 
+BOX_OF = [[i // 3 * 3 + j // 3 for j in range(9)] for i in range(9)]
 
-def is_valid_board(self, board):
-    """Проверяет валидность доски"""
-    for i in range(9):
-        for j in range(9):
-            if board[i][j] != 0:
-                num = board[i][j]
-                board[i][j] = 0
-                if not self.is_valid(i, j, num):
-                    return False
-                board[i][j] = num
-    return True
 
+class _WidePopcount:
+    """POPCOUNT для масок, таблица которых не поместилась бы в память"""
 
-class SudokuGenerator:
-    """Генератор головоломок Судоку"""
+    __slots__ = ()
+    __getitem__ = staticmethod(int.bit_count)
+
+
+class _WideMaskDigits:
+    """MASK_DIGITS для досок больше 9x9 (вычисляется на лету)"""
+
+    __slots__ = ()
+
+    @staticmethod
+    def __getitem__(mask):
+        digits = []
+        while mask:
+            low = mask & -mask
+            digits.append(low.bit_length() - 1)
+            mask ^= low
+        return tuple(digits)
+
+
+_BIT_TABLES = {9: (POPCOUNT, MASK_DIGITS)}
+
+
+def _bit_tables(size):
+    """Таблицы (POPCOUNT, MASK_DIGITS) для масок чисел 1..size"""
+    tables = _BIT_TABLES.get(size)
+    if tables is None:
+        # Таблица до 16 чисел - 2^17 элементов, для 25 уже 2^26
+        popcount = ([mask.bit_count() for mask in range(1 << size + 1)]
+                    if size <= 16 else _WidePopcount())
+        tables = _BIT_TABLES[size] = (popcount, _WideMaskDigits())
+    return tables
+
+
+class ConstraintState:
+    """Битовые маски занятых цифр по строкам, столбцам и областям.
+
+    Области (boxes) - квадраты или области пазл-судоку. Дополнительные
+    единицы вариантов учитывает подкласс _ExtraUnitsState, который
+    from_board выбирает по геометрии; у обычной доски extra_of - None.
+    """
+
+    __slots__ = ('rows', 'cols', 'boxes', 'box_of', 'full_mask')
+
+    # Дополнительные единицы клеток (см. BoardShape.extra_of)
+    extras = extra_of = None
+
+    def __init__(self, shape=None):
+        shape = shape or BoardShape.of(3)
+        self.rows = [0] * shape.size
+        self.cols = [0] * shape.size
+        self.boxes = [0] * shape.size
+        self.box_of = shape.box_of
+        self.full_mask = shape.full_mask
+
+    @classmethod
+    def from_board(cls, board, shape=None):
+        """Строит состояние по доске; None, если на доске есть конфликт.
+
+        shape - геометрия с вариантом правил (по умолчанию обычная
+        доска по размеру board).
+        """
+        size = len(board)
+        shape = shape or BoardShape.for_size(size)
+        if shape.extra_of is not None:
+            state = _ExtraUnitsState(shape)
+            for i in range(size):
+                for j, num in enumerate(board[i]):
+                    if num != 0:
+                        if not state.can_place(i, j, num):
+                            return None
+                        state.place(i, j, num)
+            return state
+
+        state = cls(shape)
+        rows, cols, boxes, box_of = state.rows, state.cols, state.boxes, state.box_of
+        for i in range(size):
+            row_of_boxes = box_of[i]
+            for j, num in enumerate(board[i]):
+                if num != 0:
+                    bit = 1 << num
+                    box = row_of_boxes[j]
+                    if (rows[i] | cols[j] | boxes[box]) & bit:
+                        return None
+                    rows[i] |= bit
+                    cols[j] |= bit
+                    boxes[box] |= bit
+        return state
+
+    def can_place(self, row, col, num):
+        """Можно ли поставить число в позицию (одна операция AND)"""
+        used = self.rows[row] | self.cols[col] | self.boxes[self.box_of[row][col]]
+        return not used >> num & 1
+
+    def candidates(self, row, col):
+        """Маска допустимых чисел для позиции"""
+        used = self.rows[row] | self.cols[col] | self.boxes[self.box_of[row][col]]
+        return ~used & self.full_mask
+
+    def candidate_count(self, row, col):
+        """Количество допустимых чисел для позиции"""
+        return self.candidates(row, col).bit_count()
+
+    def place(self, row, col, num):
+        """Отмечает число как занятое"""
+        bit = 1 << num
+        self.rows[row] |= bit
+        self.cols[col] |= bit
+        self.boxes[self.box_of[row][col]] |= bit
+
+    def unplace(self, row, col, num):
+        """Снимает отметку с числа"""
+        bit = ~(1 << num)
+        self.rows[row] &= bit
+        self.cols[col] &= bit
+        self.boxes[self.box_of[row][col]] &= bit
+
+
+class _ExtraUnitsState(ConstraintState):
+    """Маски с дополнительными единицами варианта (диагонали, окна)"""
+
+    __slots__ = ('extras', 'extra_of')
+
+    def __init__(self, shape):
+        super().__init__(shape)
+        self.extras = [0] * len(shape.extra_units)
+        self.extra_of = shape.extra_of
+
+    def extra_used(self, row, col):
+        """Числа, занятые в дополнительных единицах клетки"""
+        used = 0
+        extras = self.extras
+        for unit in self.extra_of[row][col]:
+            used |= extras[unit]
+        return used
+
+    def can_place(self, row, col, num):
+        return (super().can_place(row, col, num) and
+                not self.extra_used(row, col) >> num & 1)
+
+    def candidates(self, row, col):
+        return super().candidates(row, col) & ~self.extra_used(row, col)
+
+    def place(self, row, col, num):
+        super().place(row, col, num)
+        bit = 1 << num
+        for unit in self.extra_of[row][col]:
+            self.extras[unit] |= bit
+
+    def unplace(self, row, col, num):
+        super().unplace(row, col, num)
+        bit = ~(1 << num)
+        for unit in self.extra_of[row][col]:
+            self.extras[unit] &= bit
+
+
+def is_valid_board(board, shape=None):
+    """Нет ли на доске (список списков) конфликтов; доска не изменяется.
+
+    shape задает вариант правил. Для проверки множества досок 9x9
+    сразу см. validator.validate_boards.
+    """
+    return ConstraintState.from_board(board, shape) is not None
+
+
+class _ClueCounts:
+    """Подсказки по строкам, столбцам и числам для отсечения удалений.
+
+    Удаление заведомо дает второе решение, если после него две строки
+    одной полосы (или два столбца одной стопки) останутся без подсказок:
+    их можно переставить, - или не останется подсказок с двумя числами:
+    их можно поменять местами. Перестановки строк и столбцов ломают
+    области и дополнительные единицы вариантов, поэтому у них работает
+    только правило о числах.
+    """
+
+    __slots__ = ('box', 'lines', 'rows', 'cols', 'nums', 'empty_rows', 'empty_cols',
+                 'missing')
+
+    def __init__(self, board, shape):
+        size, box = shape.size, shape.box
+        self.box = box
+        self.lines = shape.standard
+        self.rows = [size - row.count(0) for row in board]
+        self.cols = [size - [row[j] for row in board].count(0) for j in range(size)]
+        self.nums = [0] * (size + 1)
+        for row in board:
+            for num in row:
+                self.nums[num] += 1
+        # Пустые строки по полосам, пустые столбцы по стопкам
+        self.empty_rows = [self.rows[i:i + box].count(0) for i in range(0, size, box)]
+        self.empty_cols = [self.cols[j:j + box].count(0) for j in range(0, size, box)]
+        self.missing = self.nums[1:].count(0)
+
+    def blocks(self, row, col, num):
+        """Удаление num из клетки заведомо лишает решение единственности"""
+        box = self.box
+        return ((self.lines and
+                 ((self.rows[row] == 1 and self.empty_rows[row // box] > 0) or
+                  (self.cols[col] == 1 and self.empty_cols[col // box] > 0))) or
+                (self.nums[num] == 1 and self.missing > 0))
+
+    def remove(self, row, col, num):
+        """Учитывает убранную подсказку"""
+        box = self.box
+        self.rows[row] -= 1
+        self.cols[col] -= 1
+        self.nums[num] -= 1
+        self.empty_rows[row // box] += not self.rows[row]
+        self.empty_cols[col // box] += not self.cols[col]
+        self.missing += not self.nums[num]
+
+
+class _CheckBatch:
+    """Задача проверок наперед (_dig_parallel): future, число клеток,
+    убранных к моменту снимка доски, и клетки, убранные на снимке по
+    предсказанию"""
+
+    __slots__ = ('future', 'removed', 'planned')
+
+    def __init__(self, future, removed, planned):
+        self.future = future
+        self.removed = removed
+        self.planned = planned
+
+
+class DigReport:
+    """Отчет о выкапывании клеток в create_puzzle"""
+
+    def __init__(self, target_clues, cells=81):
+        self.target_clues = target_clues
+        self.clues = cells
+        self.passes = 0
+        self.checks = 0
+        self.rejected = 0
+        # Отклонено без перебора (см. _dig_holes)
+        self.pruned = 0
+        self.nodes = 0
+        self.elapsed = 0.0
+        self.budget_exhausted = False
+
+    @property
+    def reached_target(self):
+        """Достигнуто ли целевое число подсказок"""
+        return self.clues <= self.target_clues
+
+    def __repr__(self):
+        return (f"DigReport(clues={self.clues}, target={self.target_clues}, "
+                f"passes={self.passes}, checks={self.checks}, "
+                f"rejected={self.rejected}, pruned={self.pruned}, nodes={self.nodes}, "
+                f"elapsed={self.elapsed:.3f})")
+
+
+class GeneratorStats:
+    """Счетчики работы генератора, включаемые SudokuGenerator(stats=True).
+
+    validity_checks - вычисления маски кандидатов клетки, backtracks -
+    отмененные попытки поставить число (для решателя backtracking).
+    Узлы перебора считаются всегда, в SudokuGenerator.nodes.
+    """
+
+    FIELDS = ('validity_checks', 'backtracks', 'uniqueness_checks',
+              'uniqueness_rejected', 'fill_time', 'dig_time', 'puzzles')
 
     def __init__(self):
-        self.board = [[0 for _ in range(9)] for _ in range(9)]
+        self.reset()
+
+    def reset(self):
+        """Обнуляет счетчики"""
+        self.validity_checks = 0
+        self.backtracks = 0
+        self.uniqueness_checks = 0
+        self.uniqueness_rejected = 0
+        self.fill_time = 0.0
+        self.dig_time = 0.0
+        self.puzzles = 0
+
+    def as_dict(self):
+        """Счетчики в виде словаря"""
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={value}" for name, value in self.as_dict().items())
+        return f"GeneratorStats({fields})"
+
+
+class SudokuGenerator:
+    """Генератор головоломок Судоку.
+
+    box - размер квадрата: 2 для 4x4, 3 для обычной доски 9x9,
+    4 для 16x16 и 5 для 25x25. shape (BoardShape) задает вариант правил
+    (X-судоку, виндоку, пазл-судоку) вместо box. seed - зерно (или готовый random.Random)
+    собственного генератора случайных чисел: при одном зерне, сложности
+    и GENERATOR_VERSION результат полностью повторяется (если не задан
+    time_limit). Без зерна генератор берет его из os.urandom.
+    check_workers > 1 ускоряет создание одной головоломки на нескольких
+    ядрах: проверки единственности идут наперед в пуле процессов, а
+    результат не меняется (кроме остановки по node_limit, см.
+    _dig_parallel; пул останавливает close()).
+    """
+
+    SEARCH_MODES = ('mrv', 'linear')
+    BACKENDS = ('backtracking', 'dlx')
+
+    def __init__(self, search='mrv', backend='backtracking', stats=False,
+                 on_stats=None, box=3, seed=None, check_workers=1, shape=None):
+        if search not in self.SEARCH_MODES:
+            raise ValueError(f"Недопустимый режим поиска: {search}")
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Недопустимый решатель: {backend}")
+        self.shape = shape or BoardShape.of(box)
+        if search == 'linear' and self.shape.box > 3:
+            # Без выбора клетки с наименьшим числом кандидатов перебор
+            # на досках 16x16 и 25x25 практически не завершается
+            raise ValueError("Режим поиска linear поддерживается только для досок до 9x9")
+        if backend == 'dlx' and self.shape is not BoardShape.of(3):
+            raise ValueError("Решатель dlx поддерживает только обычную доску 9x9")
+        self.search = search
+        self.backend = backend
+        self.rng = seed if isinstance(seed, random.Random) else random.Random(seed)
+        self.size = self.shape.size
+        self._popcount, self._mask_digits = _bit_tables(self.size)
+        # На больших досках одних голых одиночек мало: без скрытых
+        # одиночек проверка единственности уходит в долгий перебор
+        self._unit_cells = ([tuple(divmod(cell, self.size) for cell in unit)
+                             for unit in self.shape.units]
+                            if self.size > 9 or not self.shape.standard else None)
+        self.board = self._empty_board()
+        # Счетчик узлов перебора (накапливается между вызовами)
+        self.nodes = 0
+        self._exact_cover = SudokuExactCover() if backend == 'dlx' else None
+        # Статистика включается явно: выключенная она не стоит ничего,
+        # кроме одной проверки на узел перебора
+        self.stats = GeneratorStats() if stats or on_stats else None
+        # Бюджет текущей create_puzzle: (предел узлов, крайний срок)
+        self._budget = None
+        # Обработчик событий со статистикой каждой созданной головоломки
+        self.on_stats = on_stats
+        # Процессов для проверок единственности одной головоломки
+        # (1 - проверки идут здесь же, без пула)
+        self.check_workers = check_workers
+        self._checker = None
+        self._checker_finalizer = None
+
+    def get_stats(self):
+        """Накопленная статистика (словарь) или None, если она выключена"""
+        if self.stats is None:
+            return None
+        result = self.stats.as_dict()
+        result['nodes'] = self.nodes
+        return result
+
+    def _empty_board(self):
+        return [[0] * self.size for _ in range(self.size)]
+
+    def _require_standard(self, what):
+        if self.shape is not BoardShape.of(3):
+            raise ValueError(f"{what} поддерживается только для обычной доски 9x9")
 
     def generate_full_board(self):
         """Генерирует полное решение Судоку"""
-        self.solve_board()
+        if self.shape.standard:
+            self.board = self._empty_board()
+            self.solve_board()
+        else:
+            self._fill_with_restarts()
         return [row[:] for row in self.board]
 
+    def _fill_with_restarts(self):
+        """Заполнение доски варианта правил с перезапусками.
+
+        На пазл-судоку случайный перебор с пустой доски часто надолго
+        застревает в тупиковой ветке, а короткие попытки с новым
+        порядком чисел быстро находят решение. Предел узлов растет
+        с каждой попыткой, а на все попытки дается FILL_NODE_LIMIT узлов.
+        Если решения нет или узлы кончились, поднимается GenerationError.
+        """
+        stop = self.nodes + FILL_NODE_LIMIT
+        limit = RESTART_NODES
+        while self.nodes < stop:
+            self.board = self._empty_board()
+            self._budget = (min(self.nodes + limit, stop), None)
+            try:
+                if not self.solve_board():
+                    raise GenerationError(f"У доски {self.shape!r} нет решения")
+                return
+            except _BudgetExhausted:
+                limit += limit // 2
+            finally:
+                self._budget = None
+        self.board = self._empty_board()
+        raise GenerationError(f"Не удалось заполнить доску {self.shape!r} "
+                              f"за {FILL_NODE_LIMIT} узлов перебора")
+
     def solve_board(self):
-        """Решает доску методом backtracking"""
-        find = self.find_empty()
-        if not find:
-            return True
-        row, col = find
+        """Решает доску, выбирая случайное решение"""
+        with closing(self._solutions(self.board, True)) as solutions:
+            for _ in solutions:
+                return True
+        return False
 
-        numbers = list(range(1, 10))
-        random.shuffle(numbers)
+    def iter_solutions(self, board):
+        """Перебирает все решения доски (сама доска не изменяется)"""
+        board = [row[:] for row in board]
+        for _ in self._solutions(board, False):
+            yield [row[:] for row in board]
 
-        for num in numbers:
-            if self.is_valid(row, col, num):
-                self.board[row][col] = num
+    def _solutions(self, board, shuffle):
+        """Генератор решений: при каждой выдаче доска заполнена решением.
 
-                if self.solve_board():
-                    return True
+        Пустые клетки после остановки перебора восстанавливает
+        вызывающий код.
+        """
+        state = ConstraintState.from_board(board, self.shape)
+        if state is None:
+            return
+        if self.backend == 'dlx':
+            yield from self._exact_cover_solutions(board, shuffle)
+        else:
+            size = len(board)
+            empties = [(i, j) for i in range(size) for j in range(size)
+                       if board[i][j] == 0]
+            yield from self._search(board, state, empties, shuffle)
 
-                self.board[row][col] = 0
-        return False
+    def _exact_cover_solutions(self, board, shuffle):
+        """Решения через Dancing Links"""
+        cover = self._exact_cover
+        before = cover.nodes
+        try:
+            for cells in cover.solutions(board, shuffle, self.rng):
+                for row, col, num in cells:
+                    board[row][col] = num
+                yield
+        finally:
+            self.nodes += cover.nodes - before
+
+    def _search(self, board, state, empties, shuffle, prefer=None):
+        """Перебор с возвратом, выдающий управление на каждом решении.
+
+        Рекурсии нет: открытые развилки лежат в явном стеке, поэтому
+        глубина перебора (до 625 клеток у доски 25x25) не ограничена
+        стеком вызовов. Развилка - [строка, столбец, числа, номер
+        следующего числа, клетки, заполненные перед ней одиночками].
+        Если передана доска prefer, в каждой развилке первым пробуется
+        ее число.
+        """
+        stats = self.stats
+        mask_digits = self._mask_digits
+        shuffle_numbers = self.rng.shuffle
+        mrv = self.search == 'mrv'
+        budget = self._budget
+        stack = []
+        while True:
+            # Новый узел перебора
+            self.nodes += 1
+            if budget is not None:
+                self._check_budget(budget)
+            forced = []
+            if mrv:
+                cell = self._choose_mrv(board, state, empties, forced)
+            else:
+                cell = self._choose_first(board, empties)
+                if stats is not None and cell is not None:
+                    stats.validity_checks += 1
+
+            if cell is None:
+                yield
+            if cell:
+                row, col = cell
+                numbers = mask_digits[state.candidates(row, col)]
+                if shuffle:
+                    numbers = list(numbers)
+                    shuffle_numbers(numbers)
+                elif prefer is not None:
+                    first = prefer[row][col]
+                    if first in numbers and numbers[0] != first:
+                        numbers = (first,) + tuple(n for n in numbers if n != first)
+                stack.append([row, col, numbers, 0, forced])
+            else:
+                for row, col, num in forced:
+                    state.unplace(row, col, num)
+                    board[row][col] = 0
+
+            # Следующее число в самой глубокой развилке, где оно осталось
+            while stack:
+                frame = stack[-1]
+                row, col, numbers, index, forced = frame
+                if index:
+                    state.unplace(row, col, numbers[index - 1])
+                if index < len(numbers):
+                    num = numbers[index]
+                    frame[3] = index + 1
+                    board[row][col] = num
+                    state.place(row, col, num)
+                    break
+                board[row][col] = 0
+                for row, col, num in forced:
+                    state.unplace(row, col, num)
+                    board[row][col] = 0
+                stack.pop()
+                if stats is not None:
+                    stats.backtracks += len(numbers)
+            else:
+                return
+
+    def _check_budget(self, budget):
+        """Прерывает перебор, если бюджет create_puzzle исчерпан"""
+        node_stop, deadline = budget
+        if node_stop is not None and self.nodes >= node_stop:
+            raise _BudgetExhausted
+        # Время проверяем не на каждом узле
+        if deadline is not None and not self.nodes & 0xFF and time.monotonic() >= deadline:
+            raise _BudgetExhausted
+
+    def _choose_first(self, board, empties):
+        """Первая пустая клетка в порядке обхода по строкам"""
+        for row, col in empties:
+            if board[row][col] == 0:
+                return (row, col)
+        return None
+
+    def _choose_mrv(self, board, state, empties, forced):
+        """Выбирает пустую клетку с наименьшим числом кандидатов.
+
+        Клетки с единственным кандидатом заполняются сразу и
+        добавляются в forced. Возвращает клетку, None если пустых
+        клеток не осталось, или False при противоречии.
+        """
+        rows, cols, boxes = state.rows, state.cols, state.boxes
+        box_of, full_mask = state.box_of, state.full_mask
+        extra_of = state.extra_of
+        popcount = self._popcount
+        stats = self.stats
+        while True:
+            if stats is not None:
+                # Считаем отдельно, чтобы не нагружать цикл ниже
+                stats.validity_checks += sum(1 for row, col in empties
+                                             if board[row][col] == 0)
+            best = None
+            best_count = self.size + 1
+            progress = False
+            for row, col in empties:
+                if board[row][col] != 0:
+                    continue
+                mask = ~(rows[row] | cols[col] | boxes[box_of[row][col]]) & full_mask
+                if extra_of is not None:
+                    mask &= ~state.extra_used(row, col)
+                n = popcount[mask]
+                if n == 0:
+                    return False
+                if n == 1:
+                    num = mask.bit_length() - 1
+                    board[row][col] = num
+                    state.place(row, col, num)
+                    forced.append((row, col, num))
+                    progress = True
+                elif n < best_count:
+                    best = (row, col)
+                    best_count = n
+            if not progress and best is not None and self._unit_cells is not None:
+                progress = self._hidden_singles(board, state, forced)
+                if progress is None:
+                    return False
+            if not progress:
+                return best
+
+    def _hidden_singles(self, board, state, forced):
+        """Ставит числа, которым в единице осталось одно место.
+
+        Возвращает True, если что-то поставлено, False, если нет,
+        и None, если какому-то числу в единице не осталось места.
+        """
+        rows, cols, boxes = state.rows, state.cols, state.boxes
+        box_of, full_mask = state.box_of, state.full_mask
+        extra_of = state.extra_of
+        progress = False
+        for unit in self._unit_cells:
+            once = twice = placed = 0
+            for row, col in unit:
+                num = board[row][col]
+                if num:
+                    placed |= 1 << num
+                    continue
+                mask = ~(rows[row] | cols[col] | boxes[box_of[row][col]]) & full_mask
+                if extra_of is not None:
+                    mask &= ~state.extra_used(row, col)
+                twice |= once & mask
+                once |= mask
+            if (once | placed) != full_mask:
+                return None
+            single = once & ~twice
+            while single:
+                bit = single & -single
+                single ^= bit
+                for row, col in unit:
+                    if board[row][col] == 0 and state.candidates(row, col) & bit:
+                        num = bit.bit_length() - 1
+                        board[row][col] = num
+                        state.place(row, col, num)
+                        forced.append((row, col, num))
+                        progress = True
+                        break
+        return progress
 
     def find_empty(self):
         """Находит пустую клетку"""
-        for i in range(9):
-            for j in range(9):
-                if self.board[i][j] == 0:
-                    return (i, j)
-        return None
+        return self.find_empty_in_board(self.board)
 
     def is_valid(self, row, col, num):
         """Проверяет валидность числа в позиции"""
-        # Проверка строки
-        for j in range(9):
-            if self.board[row][j] == num:
-                return False
+        return self.is_valid_in_board(self.board, row, col, num)
 
-        # Проверка столбца
-        for i in range(9):
-            if self.board[i][col] == num:
-                return False
+    def create_puzzle(self, difficulty='medium', time_limit=None,
+                      node_limit=None, restarts=2):
+        """Создает головоломку заданной сложности.
 
-        # Проверка квадрата 3x3
-        box_row = row // 3 * 3
-        box_col = col // 3 * 3
+        Клетки перебираются в случайном порядке, и каждая проверяется
+        не больше одного раза. Если цель не достигнута, берется новое
+        решение (не больше restarts раз) и остается лучшая головоломка.
+        time_limit (секунды) и node_limit (узлы перебора) ограничивают
+        работу. Отчет сохраняется в self.last_report.
+        """
+        if difficulty not in DIFFICULTIES:
+            raise ValueError(f"Недопустимая сложность: {difficulty}")
+        cells = self.shape.cells
+        if self.shape.box in REMOVE_SHARE:
+            cells_to_remove = int(REMOVE_SHARE[self.shape.box][difficulty] * cells)
+        else:
+            cells_to_remove = CELLS_TO_REMOVE[difficulty] * cells // 81
 
-        for i in range(box_row, box_row + 3):
-            for j in range(box_col, box_col + 3):
-                if self.board[i][j] == num:
-                    return False
+        start = time.monotonic()
+        start_nodes = self.nodes
+        deadline = start + time_limit if time_limit is not None else None
+        node_stop = start_nodes + node_limit if node_limit is not None else None
+        stats = self.stats
+        if stats is not None:
+            before = self.get_stats()
 
-        return True
+        report = DigReport(cells - cells_to_remove, cells)
+        best = None
+        for _ in range(restarts + 1):
+            if stats is not None:
+                phase_start = time.perf_counter()
+            solution = self.generate_full_board()
+            if stats is not None:
+                phase_end = time.perf_counter()
+                stats.fill_time += phase_end - phase_start
+            removed = self._dig_holes(self.board, solution, cells_to_remove,
+                                      deadline, node_stop, report)
+            if stats is not None:
+                stats.dig_time += time.perf_counter() - phase_end
+            report.passes += 1
+            if best is None or removed > best[0]:
+                best = (removed, Board.from_lists(self.board), solution)
+            if removed == cells_to_remove or report.budget_exhausted:
+                break
+
+        removed, puzzle, solution = best
+        self.board = puzzle.to_lists()
+        report.clues = cells - removed
+        report.nodes = self.nodes - start_nodes
+        report.elapsed = time.monotonic() - start
+        self.last_report = report
+        if stats is not None:
+            stats.puzzles += 1
+            self._emit_stats(before, difficulty, report)
+        return puzzle.to_lists(), solution
+
+    def _emit_stats(self, before, difficulty, report):
+        """Передает обработчику on_stats статистику одной головоломки"""
+        if self.on_stats is None:
+            return
+        after = self.get_stats()
+        event = {name: after[name] - before[name] for name in after}
+        event.update(difficulty=difficulty, clues=report.clues,
+                     target_clues=report.target_clues, passes=report.passes,
+                     elapsed=report.elapsed)
+        self.on_stats(event)
+
+    def _dig_holes(self, board, solution, cells_to_remove, deadline, node_stop, report,
+                   cells=None):
+        """Убирает числа, сохраняя единственность решения.
+
+        Обходит клетки cells (по умолчанию - случайную перестановку всех
+        клеток), проверяя каждую один раз. Решение доски известно, поэтому
+        проверка ищет только решение с другим числом в убранной клетке
+        (has_other_solution). Без перебора отклоняются удаления, после
+        которых решений заведомо больше одного (см. _ClueCounts). Бюджет
+        проверяется и между проверками единственности, и внутри перебора.
+        При check_workers > 1 (и больше чем одном доступном ядре) проверки
+        идут наперед в пуле процессов, а результат тот же. Возвращает
+        количество убранных чисел.
+        """
+        if cells is None:
+            cells = list(range(self.shape.cells))
+            self.rng.shuffle(cells)
+        checks_before, rejected_before = report.checks, report.rejected
+        clues = _ClueCounts(board, self.shape)
+        parallel = self.check_workers > 1 and _available_cpus() > 1
+        dig = self._dig_parallel if parallel else self._dig_serial
+        removed = dig(board, solution, cells_to_remove, deadline, node_stop, report,
+                      cells, clues)
+        if self.stats is not None:
+            self.stats.uniqueness_checks += report.checks - checks_before
+            self.stats.uniqueness_rejected += report.rejected - rejected_before
+        return removed
+
+    def _budget_spent(self, deadline, node_stop):
+        return ((deadline is not None and time.monotonic() >= deadline) or
+                (node_stop is not None and self.nodes >= node_stop))
+
+    def _dig_serial(self, board, solution, cells_to_remove, deadline, node_stop, report,
+                    cells, clues):
+        removed = 0
+        for cell in cells:
+            if removed == cells_to_remove:
+                break
+            if self._budget_spent(deadline, node_stop):
+                report.budget_exhausted = True
+                break
+            row, col = divmod(cell, self.size)
+            num = board[row][col]
+            if clues.blocks(row, col, num):
+                report.rejected += 1
+                report.pruned += 1
+                continue
 
-    def create_puzzle(self, difficulty='medium'):
-        """Создает головоломку заданной сложности"""
-        self.generate_full_board()
-        solution = [row[:] for row in self.board]
-
-        # Определяем количество убираемых чисел
-        if difficulty == 'easy':
-            cells_to_remove = 40
-        elif difficulty == 'medium':
-            cells_to_remove = 50
-        else:  # hard
-            cells_to_remove = 60
-
-        # Убираем числа
-        attempts = cells_to_remove
-        while attempts > 0:
-            row = random.randint(0, 8)
-            col = random.randint(0, 8)
-
-            if self.board[row][col] != 0:
-                backup = self.board[row][col]
-                self.board[row][col] = 0
-
-                # Проверяем уникальность решения
-                temp_board = [row[:] for row in self.board]
-                if not self.has_unique_solution(temp_board):
-                    self.board[row][col] = backup
+            report.checks += 1
+            try:
+                unique = self._try_remove(board, row, col, solution, deadline, node_stop)
+            except _BudgetExhausted:
+                report.budget_exhausted = True
+                break
+            if unique:
+                clues.remove(row, col, num)
+                removed += 1
+            else:
+                report.rejected += 1
+        return removed
+
+    def _dig_parallel(self, board, solution, cells_to_remove, deadline, node_stop, report,
+                      cells, clues):
+        """Выкапывание с проверками наперед в пуле процессов.
+
+        Решения принимаются здесь же, строго в порядке cells, а процессы
+        пула заранее проверяют следующие клетки пакетами по CHECK_BATCH.
+        Задача получает предсказанную доску: клетки перед пакетом, для
+        которых уже есть ответ "убирается", на ней убраны, клетки без
+        ответа оставлены, и каждая клетка пакета проверяется на ней по
+        отдельности. Ответ "нет" верен, если предсказание сбылось: после
+        снимка убраны ровно предсказанные клетки, а ответ "есть другое
+        решение" - если убраны хотя бы они (_check_still_valid). Клетки
+        с неверным ответом проверяются здесь же заново, так что каждое
+        решение совпадает с последовательным проходом. Задача
+        отправляется, только если ожидаемая экономия (доля отказов на
+        время проверки) больше расходов на задачу (TASK_OVERHEAD), иначе
+        проход идет как последовательный.
+
+        Ускорение ограничено самим порядком: в конце прохода, где идут
+        самые долгие проверки, убирается примерно каждая третья клетка, и
+        каждое удаление, которого не было в предсказании, делает неверными
+        ответы "нет" на клетки, отправленные до него. Такие клетки все
+        равно проверяются здесь же одна за другой, сколько бы ни было
+        процессов в пуле. Проверка клеток пакета на одной доске подряд,
+        с удалениями, не помогает: после первого предсказанного удаления
+        неверным может оказаться и ответ "есть другое решение".
+
+        Исключение - node_limit: готовый ответ пула учитывается узлами
+        проверки на снимке, поэтому проход может остановиться не там,
+        где последовательный.
+        """
+        pool = self._check_pool()
+        size = self.size
+        solution_cells = bytes(num for row in solution for num in row)
+        batches = []
+        # Ответы пула: клетка -> (есть ли другое решение, узлы, убрано
+        # клеток на момент снимка, клетки, убранные на снимке по
+        # предсказанию)
+        answers = {}
+        # Убранные клетки по порядку
+        removals = []
+        # Среднее время проверки здесь же (None, пока проверок не было)
+        check_time = None
+        sent = checked = rejected = 0
+
+        try:
+            for index, cell in enumerate(cells):
+                if len(removals) == cells_to_remove:
+                    break
+                if self._budget_spent(deadline, node_stop):
+                    report.budget_exhausted = True
+                    break
+
+                _collect_checks(batches, answers)
+                sent = max(sent, index + 1)
+                while (len(batches) < self.check_workers and sent < len(cells) and
+                       check_time is not None and
+                       CHECK_BATCH * check_time * (rejected + 1) / (checked + 2) >
+                       TASK_OVERHEAD):
+                    # Клетки без ответа предсказываются оставленными
+                    predicted = bytearray(value for row in board for value in row)
+                    planned = []
+                    for pending in cells[index:sent]:
+                        known = answers.get(pending)
+                        if known is not None and not known[0]:
+                            predicted[pending] = 0
+                            planned.append(pending)
+                    batch = cells[sent:sent + CHECK_BATCH]
+                    future = pool.submit(_check_batch_in_worker, bytes(predicted),
+                                         solution_cells, batch)
+                    batches.append(_CheckBatch(future, len(removals), tuple(planned)))
+                    sent += len(batch)
+
+                row, col = divmod(cell, size)
+                num = board[row][col]
+                if clues.blocks(row, col, num):
+                    report.rejected += 1
+                    report.pruned += 1
+                    continue
+
+                report.checks += 1
+                checked += 1
+                known = answers.pop(cell, None)
+                if known is not None and _check_still_valid(known, removals):
+                    other, nodes = known[:2]
+                    self.nodes += nodes
+                    unique = not other
+                    if unique:
+                        board[row][col] = 0
+                else:
+                    start = time.perf_counter()
+                    try:
+                        unique = self._try_remove(board, row, col, solution,
+                                                  deadline, node_stop)
+                    except _BudgetExhausted:
+                        report.budget_exhausted = True
+                        break
+                    elapsed = time.perf_counter() - start
+                    check_time = (elapsed if check_time is None
+                                  else (3 * check_time + elapsed) / 4)
+                if unique:
+                    clues.remove(row, col, num)
+                    removals.append(cell)
                 else:
-                    attempts -= 1
+                    report.rejected += 1
+                    rejected += 1
+        finally:
+            for batch in batches:
+                batch.future.cancel()
+        return len(removals)
+
+    def _try_remove(self, board, row, col, solution, deadline, node_stop):
+        """Убирает число из клетки, если решение остается единственным.
+
+        Если бюджет кончился посреди проверки, клетка возвращается на
+        место, а _BudgetExhausted передается дальше.
+        """
+        num = board[row][col]
+        board[row][col] = 0
+        limited = node_stop is not None or deadline is not None
+        self._budget = (node_stop, deadline) if limited else None
+        try:
+            other = self.has_other_solution(board, row, col, num, solution)
+        except _BudgetExhausted:
+            board[row][col] = num
+            raise
+        finally:
+            self._budget = None
+        if other:
+            board[row][col] = num
+        return not other
 
-        return [row[:] for row in self.board], solution
+    def _check_pool(self):
+        """Пул процессов для проверок единственности (создается при первом обращении).
+
+        Если генератор не закрыли (close или with), пул останавливается,
+        когда генератор собирает сборщик мусора, или при выходе.
+        """
+        if self._checker is None:
+            options = {'search': self.search, 'backend': self.backend,
+                       'shape': self.shape}
+            self._checker = ProcessPoolExecutor(max_workers=self.check_workers,
+                                                initializer=_init_worker,
+                                                initargs=(options,))
+            self._checker_finalizer = weakref.finalize(
+                self, self._checker.shutdown, wait=False, cancel_futures=True)
+        return self._checker
+
+    def close(self):
+        """Останавливает пул процессов проверок, если он создавался"""
+        if self._checker is not None:
+            self._checker_finalizer.detach()
+            self._checker.shutdown(wait=True, cancel_futures=True)
+            self._checker = self._checker_finalizer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def create_rated_puzzle(self, difficulty='medium', max_attempts=30, **limits):
+        """Создает головоломку с измеренной сложностью из RATING_RANGES.
+
+        Головоломки генерируются, пока оценка rate_puzzle не попадет в
+        диапазон сложности. Для средней и сложной клетки убираются по
+        максимуму, а отбор делает оценка. Если за max_attempts попасть не
+        удалось, возвращается головоломка с ближайшей оценкой. Оценка
+        сохраняется в self.last_rating, limits передаются в create_puzzle.
+        """
+        if difficulty not in DIFFICULTIES:
+            raise ValueError(f"Недопустимая сложность: {difficulty}")
+        self._require_standard("Оценка сложности")
+        low, high = RATING_RANGES[difficulty]
+        dig = 'easy' if difficulty == 'easy' else 'hard'
+
+        best = None
+        for _ in range(max_attempts):
+            puzzle, solution = self.create_puzzle(dig, **limits)
+            rating = rate_puzzle(puzzle)
+            distance = max(low - rating.rating, rating.rating - high, 0)
+            if best is None or distance < best[0]:
+                best = (distance, puzzle, solution, rating)
+            if distance == 0:
+                break
+
+        _, puzzle, solution, self.last_rating = best
+        return puzzle, solution
+
+    def create_minimal_puzzle(self, target_clues=MINIMAL_CLUES, time_limit=30.0,
+                              node_limit=None, perturb=2, max_stall=200):
+        """Создает минимальную головоломку: ни одну подсказку нельзя убрать.
+
+        Один полный проход _dig_holes по всем клеткам уже дает
+        минимальную головоломку: если без подсказки решение было не
+        единственным, то без нее и еще нескольких тем более. Дальше
+        локальный поиск приближается к target_clues: возвращает perturb
+        убранных клеток и снова проходит по всем подсказкам, сначала по
+        старым. Результат принимается, если подсказок не больше, чем
+        было; после max_stall попыток без улучшения берется новое
+        решение. Первый проход выполняется целиком, а time_limit
+        (секунды) и node_limit ограничивают поиск после него; прерванный
+        проход отбрасывается, поэтому головоломка минимальна всегда,
+        даже если цель не достигнута. Отчет сохраняется в self.last_report.
+        """
+        self._require_standard("Минимальная головоломка")
+        cells = self.shape.cells
+        start = time.monotonic()
+        start_nodes = self.nodes
+        deadline = start + time_limit if time_limit is not None else None
+        node_stop = start_nodes + node_limit if node_limit is not None else None
+
+        report = DigReport(target_clues, cells)
+        best = None
+        while best is None or (best[0] > target_clues and not report.budget_exhausted):
+            solution = self.generate_full_board()
+            board = self.board
+            if best is None:
+                self._dig_holes(board, solution, cells, None, None, report)
+            else:
+                self._dig_holes(board, solution, cells, deadline, node_stop, report)
+                if report.budget_exhausted:
+                    break
+            report.passes += 1
+            clues = self._clue_cells(board)
+
+            stall = 0
+            while len(clues) > target_clues and stall < max_stall:
+                trial = [row[:] for row in board]
+                holes = sorted(set(range(cells)) - set(clues))
+                restored = self.rng.sample(holes, min(perturb, len(holes)))
+                for cell in restored:
+                    row, col = divmod(cell, self.size)
+                    trial[row][col] = solution[row][col]
+                # Возвращенные клетки убираются последними: иначе проход
+                # чаще всего просто вернется к прежней головоломке
+                self.rng.shuffle(clues)
+                self.rng.shuffle(restored)
+                self._dig_holes(trial, solution, cells, deadline, node_stop, report,
+                                clues + restored)
+                if report.budget_exhausted:
+                    break
+                report.passes += 1
+                trial_clues = self._clue_cells(trial)
+                stall = stall + 1 if len(trial_clues) >= len(clues) else 0
+                if len(trial_clues) <= len(clues):
+                    board, clues = trial, trial_clues
+
+            if best is None or len(clues) < best[0]:
+                best = (len(clues), Board.from_lists(board), solution)
+
+        report.clues, puzzle, solution = best
+        self.board = puzzle.to_lists()
+        report.nodes = self.nodes - start_nodes
+        report.elapsed = time.monotonic() - start
+        self.last_report = report
+        return puzzle.to_lists(), solution
+
+    def _clue_cells(self, board):
+        """Номера клеток с подсказками"""
+        size = self.size
+        return [cell for cell in range(self.shape.cells) if board[cell // size][cell % size]]
+
+    def is_minimal(self, puzzle):
+        """Головоломка с единственным решением, из которой нельзя убрать подсказку"""
+        if not self.has_unique_solution(puzzle):
+            return False
+        board = [row[:] for row in puzzle]
+        for cell in self._clue_cells(board):
+            row, col = divmod(cell, self.size)
+            num = board[row][col]
+            board[row][col] = 0
+            other = self.has_other_solution(board, row, col, num)
+            board[row][col] = num
+            if not other:
+                return False
+        return True
+
+    def create_puzzle_variants(self, difficulty='medium', count=1000):
+        """Создает одну головоломку и выдает count равносильных пар.
+
+        Первая пара - сама сгенерированная головоломка, остальные
+        получены преобразованиями симметрии без повторной проверки
+        единственности.
+        """
+        self._require_standard("Размножение по симметрии")
+        puzzle, solution = self.create_puzzle(difficulty)
+        yield from _with_variants(puzzle, solution, count, self.rng)
 
     def has_unique_solution(self, board):
         """Проверяет, имеет ли доска единственное решение"""
@@ -142,62 +1100,354 @@ class SudokuGenerator:
         self.count_solutions(board, count)
         return count[0] == 1
 
-    def count_solutions(self, board, count):
-        """Считает количество решений"""
-        if count[0] > 1:
-            return
+    def has_other_solution(self, board, row, col, num, solution=None):
+        """Есть ли у доски решение, где в пустой клетке (row, col) не num.
 
-        find = self.find_empty_in_board(board)
-        if not find:
-            count[0] += 1
-            return
+        Если до удаления num доска имела единственное решение, то после
+        удаления оно остается единственным ровно тогда, когда такого
+        решения нет. Поиск идет до первого найденного решения, а уже
+        известное решение повторно не ищется. Другое решение обычно
+        отличается от известного solution в немногих клетках, поэтому
+        в развилках первым пробуется число из solution.
+        """
+        state = ConstraintState.from_board(board, self.shape)
+        if state is None:
+            return False
+        size = len(board)
+        empties = [(i, j) for i in range(size) for j in range(size)
+                   if board[i][j] == 0]
+        rest = [cell for cell in empties if cell != (row, col)]
+        try:
+            for other in self._mask_digits[state.candidates(row, col) & ~(1 << num)]:
+                board[row][col] = other
+                if self.backend == 'dlx':
+                    solutions = self._exact_cover_solutions(board, False)
+                else:
+                    # Состояние строится один раз на все числа клетки
+                    state.place(row, col, other)
+                    solutions = self._search(board, state, rest, False, solution)
+                with closing(solutions):
+                    for _ in solutions:
+                        return True
+                if self.backend != 'dlx':
+                    state.unplace(row, col, other)
+            return False
+        finally:
+            for i, j in empties:
+                board[i][j] = 0
 
-        row, col = find
-        for num in range(1, 10):
-            if self.is_valid_in_board(board, row, col, num):
-                board[row][col] = num
-                self.count_solutions(board, count)
+    def count_solutions(self, board, count, limit=2):
+        """Считает количество решений (перебор останавливается на limit)"""
+        if count[0] >= limit:
+            return
+        size = len(board)
+        empties = [(i, j) for i in range(size) for j in range(size)
+                   if board[i][j] == 0]
+        try:
+            with closing(self._solutions(board, False)) as solutions:
+                for _ in solutions:
+                    count[0] += 1
+                    if count[0] >= limit:
+                        break
+        finally:
+            for row, col in empties:
                 board[row][col] = 0
 
     def find_empty_in_board(self, board):
         """Находит пустую клетку в заданной доске"""
-        for i in range(9):
-            for j in range(9):
+        for i in range(self.size):
+            for j in range(self.size):
                 if board[i][j] == 0:
                     return (i, j)
         return None
 
     def is_valid_in_board(self, board, row, col, num):
-        """Проверка валидности для заданной доски"""
-        # Проверка строки
-        for j in range(9):
-            if board[row][j] == num:
-                return False
+        """Проверка валидности для заданной доски: нет ли num в единицах
+        клетки (строке, столбце, области и единицах варианта)"""
+        shape, size = self.shape, self.size
+        for unit in shape.cell_units[row * size + col]:
+            for cell in shape.units[unit]:
+                if board[cell // size][cell % size] == num:
+                    return False
+        return True
 
-        # Проверка столбца
-        for i in range(9):
-            if board[i][col] == num:
-                return False
 
-        # Проверка квадрата
-        box_row = row // 3 * 3
-        box_col = col // 3 * 3
+# Генератор процесса-исполнителя пакетной генерации
+_worker_generator = None
 
-        for i in range(box_row, box_row + 3):
-            for j in range(box_col, box_col + 3):
-                if board[i][j] == num:
-                    return False
 
-        return True
+def _available_cpus():
+    """Число ядер, доступных процессу"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _init_worker(options):
+    """Инициализация процесса пула: свой генератор со своим зерном"""
+    global _worker_generator
+    _worker_generator = SudokuGenerator(**options)
+
+
+def _check_still_valid(known, removals):
+    """Верен ли ответ пула из _dig_parallel для настоящей доски, где
+    по порядку убраны клетки removals.
+
+    Подсказок со временем только меньше, поэтому другое решение
+    остается и на настоящей доске, если на ней убраны все предсказанные
+    клетки, а единственность - только если убраны ровно они.
+    """
+    other, _, removed, planned = known
+    done = removals[removed:]
+    if other:
+        return set(planned).issubset(done)
+    return tuple(done) == planned
+
+
+def _collect_checks(batches, answers):
+    """Переносит ответы завершенных задач _dig_parallel в answers"""
+    for batch in [batch for batch in batches if batch.future.done()]:
+        batches.remove(batch)
+        for cell, other, nodes in batch.future.result():
+            answers[cell] = (other, nodes, batch.removed, batch.planned)
+
+
+def _check_batch_in_worker(cells, solution, batch):
+    """Проверки для _dig_parallel: каждая клетка batch убирается из доски
+    cells по отдельности. Список (клетка, есть ли другое решение, узлы)"""
+    generator = _worker_generator
+    shape = generator.shape
+    board = Board(cells, shape=shape).to_lists()
+    solution = Board(solution, shape=shape).to_lists()
+    results = []
+    for cell in batch:
+        row, col = divmod(cell, generator.size)
+        num = board[row][col]
+        board[row][col] = 0
+        nodes = generator.nodes
+        other = generator.has_other_solution(board, row, col, num, solution)
+        board[row][col] = num
+        results.append((cell, other, generator.nodes - nodes))
+    return results
+
+
+def _create_in_worker(difficulty, rated, with_key, seed, minimal, count):
+    """Головоломка и count - 1 равносильных ей, ключ для отбрасывания дубликатов.
+
+    Варианты берутся из генератора случайных чисел процесса после
+    генерации, поэтому с зерном задачи они тоже воспроизводимы.
+    """
+    if seed is not None:
+        _worker_generator.rng.seed(seed)
+    if minimal is not None:
+        puzzle, solution = _worker_generator.create_minimal_puzzle(minimal)
+    elif rated:
+        puzzle, solution = _worker_generator.create_rated_puzzle(difficulty)
+    else:
+        puzzle, solution = _worker_generator.create_puzzle(difficulty)
+    # Каноническая форма дорогая, поэтому считается в процессе пула
+    key = canonical_key(puzzle) if with_key else None
+    return list(_with_variants(puzzle, solution, count, _worker_generator.rng)), key
+
+
+def generate_batch(n, difficulty='medium', workers=None, variants=1,
+                   dedup=None, rated=False, seed=None, minimal=None, **options):
+    """Генерирует n головоломок в пуле процессов.
+
+    Пары (головоломка, решение) выдаются по мере готовности, в порядке
+    завершения. При variants > 1 каждая сгенерированная головоломка
+    дополняется variants - 1 равносильными ей (см. symmetry). Если
+    передан dedup (dedup.DedupIndex), головоломки, равносильные уже
+    записанным в индекс, отбрасываются, а новые добавляются в него.
+    При rated=True сложность подтверждается оценкой (create_rated_puzzle).
+    С зерном seed каждая задача получает свое зерно из общей
+    последовательности, а варианты создаются в той же задаче, поэтому
+    партия воспроизводима (с точностью до порядка выдачи). С minimal (целевое число подсказок) создаются
+    минимальные головоломки (create_minimal_puzzle), а difficulty не
+    используется. options передаются в конструктор SudokuGenerator.
+    """
+    if difficulty not in DIFFICULTIES:
+        raise ValueError(f"Недопустимая сложность: {difficulty}")
+    if variants < 1:
+        raise ValueError(f"Недопустимое число вариантов: {variants}")
+    if dedup is not None and variants > 1:
+        raise ValueError("Варианты по симметрии всегда являются дубликатами")
+    shape = options.get('shape') or BoardShape.of(options.get('box', 3))
+    if shape is not BoardShape.of(3) and (variants > 1 or dedup is not None or rated or
+                                          minimal is not None):
+        raise ValueError("Варианты, дубликаты, оценка и минимальные головоломки "
+                         "поддерживаются только для обычной доски 9x9")
+    if rated and minimal is not None:
+        raise ValueError("Сложность минимальной головоломки не подбирается оценкой")
+
+    # Обычная функция, а не генератор: аргументы проверяются сразу при вызове
+    seeds = random.Random(seed) if seed is not None else None
+    return _generate_in_pool(n, difficulty, workers, options, dedup, rated, seeds,
+                             minimal, variants)
+
+
+def _with_variants(puzzle, solution, count, rng):
+    """Головоломка и count - 1 равносильных ей"""
+    yield puzzle, solution
+    yield from equivalent_puzzles(puzzle, solution, count - 1, rng)
+
+
+def _generate_in_pool(n, difficulty, workers, options, dedup, rated, seeds, minimal,
+                      variants):
+    """Генерирует n различных головоломок в пуле процессов по мере готовности.
+
+    seeds - random.Random, из которого берутся зерна задач, или None.
+    Задача создает головоломку и до variants - 1 равносильных ей; число
+    пар каждой задачи определяется при отправке, а не по порядку
+    завершения.
+    """
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(options,))
+    # Ограничиваем число задач в полете, чтобы память не росла с n
+    in_flight = workers * 4
+    pending = {}
+    accepted = planned = 0
+    try:
+        while accepted < n:
+            while planned < n and len(pending) < in_flight:
+                seed = seeds.getrandbits(64) if seeds is not None else None
+                count = min(variants, n - planned)
+                future = pool.submit(_create_in_worker, difficulty, rated,
+                                     dedup is not None, seed, minimal, count)
+                pending[future] = count
+                planned += count
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                count = pending.pop(future)
+                pairs, key = future.result()
+                if dedup is not None and not dedup.add_key(key):
+                    pairs = []
+                # Недостающие пары (дубликат, мало вариантов) заказываются заново
+                planned -= count - len(pairs)
+                accepted += len(pairs)
+                yield from pairs
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def make_puzzle_id(seed, difficulty, box=3, rated=False):
+    """8-байтовый идентификатор головоломки вместо ее клеток.
+
+    Байт версии генератора, байт параметров (сложность, размер,
+    оценка) и 48-битное зерно. По идентификатору головоломка
+    восстанавливается функцией puzzle_from_id.
+    """
+    if difficulty not in DIFFICULTIES:
+        raise ValueError(f"Недопустимая сложность: {difficulty}")
+    if not 0 <= seed < 1 << 48:
+        raise ValueError(f"Зерно не помещается в 48 бит: {seed}")
+    if not 2 <= box <= 5:
+        raise ValueError(f"Недопустимый размер квадрата: {box}")
+    flags = DIFFICULTIES.index(difficulty) | (box - 2) << 2 | rated << 4
+    return bytes((GENERATOR_VERSION, flags)) + seed.to_bytes(6, 'big')
+
+
+def new_puzzle_id(difficulty, box=3, rated=False, rng=random):
+    """Идентификатор новой головоломки со случайным зерном"""
+    return make_puzzle_id(rng.getrandbits(48), difficulty, box, rated)
+
+
+def parse_puzzle_id(puzzle_id):
+    """Разбирает идентификатор (bytes или hex-строку): (seed, difficulty, box, rated)"""
+    if isinstance(puzzle_id, str):
+        puzzle_id = bytes.fromhex(puzzle_id)
+    if len(puzzle_id) != 8:
+        raise ValueError(f"Идентификатор должен занимать 8 байт: {puzzle_id!r}")
+    version, flags = puzzle_id[0], puzzle_id[1]
+    if version != GENERATOR_VERSION:
+        raise ValueError(f"Идентификатор другой версии генератора: {version}")
+    difficulty = flags & 0b11
+    if difficulty >= len(DIFFICULTIES) or flags >> 5:
+        raise ValueError(f"Некорректный идентификатор: {puzzle_id.hex()}")
+    seed = int.from_bytes(puzzle_id[2:], 'big')
+    return seed, DIFFICULTIES[difficulty], (flags >> 2 & 0b11) + 2, bool(flags >> 4 & 1)
+
+
+def puzzle_from_id(puzzle_id):
+    """Восстанавливает (головоломка, решение) по идентификатору"""
+    seed, difficulty, box, rated = parse_puzzle_id(puzzle_id)
+    generator = SudokuGenerator(box=box, seed=seed)
+    if rated:
+        return generator.create_rated_puzzle(difficulty)
+    return generator.create_puzzle(difficulty)
+
+
+def main(argv=None):
+    """Пакетная генерация из командной строки: по строке на головоломку"""
+    parser = argparse.ArgumentParser(description="Генератор головоломок Судоку")
+    parser.add_argument('-n', '--count', type=int, default=1,
+                        help="количество головоломок")
+    parser.add_argument('-d', '--difficulty', choices=DIFFICULTIES,
+                        default='medium', help="сложность")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="число процессов (по умолчанию - число ядер)")
+    parser.add_argument('--backend', choices=SudokuGenerator.BACKENDS,
+                        default='backtracking', help="решатель")
+    parser.add_argument('--box', type=int, choices=(2, 3, 4, 5), default=3,
+                        help="размер квадрата: 3 - доска 9x9, 4 - 16x16")
+    parser.add_argument('--variant', choices=tuple(VARIANTS), default='standard',
+                        help="вариант правил: x - диагонали, windoku - "
+                             "дополнительные квадраты")
+    parser.add_argument('--regions', metavar='LAYOUT', default=None,
+                        help="пазл-судоку: строка областей, по символу на клетку")
+    parser.add_argument('--variants', type=int, default=1,
+                        help="равносильных головоломок на одну сгенерированную")
+    parser.add_argument('--dedup', metavar='PATH',
+                        help="файл индекса для отбрасывания дубликатов")
+    parser.add_argument('--rated', action='store_true',
+                        help="подтверждать сложность оценкой по приемам решения")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="зерно для воспроизводимой партии")
+    parser.add_argument('--minimal', type=int, metavar='CLUES', default=None,
+                        help="минимальные головоломки с целью CLUES подсказок "
+                             f"(обычно {MINIMAL_CLUES}); -d не используется")
+    args = parser.parse_args(argv)
+    if args.regions is not None and args.variant != 'standard':
+        parser.error("--regions и --variant не сочетаются")
+    try:
+        if args.regions is not None:
+            shape = BoardShape.jigsaw(args.regions)
+        else:
+            shape = BoardShape.variant(args.variant, args.box)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.backend == 'dlx' and shape is not BoardShape.of(3):
+        parser.error("Решатель dlx поддерживает только обычную доску 9x9")
+    if args.variants < 1:
+        parser.error("--variants должно быть не меньше 1")
+    if args.dedup and args.variants > 1:
+        parser.error("--dedup не сочетается с --variants: варианты всегда дубликаты")
+    if args.rated and args.minimal is not None:
+        parser.error("--rated не сочетается с --minimal")
+    if shape is not BoardShape.of(3) and (args.variants > 1 or args.dedup or args.rated or
+                                          args.minimal is not None):
+        parser.error("--variants, --dedup, --rated и --minimal поддерживаются "
+                     "только для обычной доски 9x9")
+
+    index = DedupIndex(args.dedup) if args.dedup else None
+    try:
+        for puzzle, solution in generate_batch(args.count, args.difficulty,
+                                               workers=args.workers,
+                                               variants=args.variants,
+                                               dedup=index,
+                                               rated=args.rated,
+                                               seed=args.seed,
+                                               minimal=args.minimal,
+                                               backend=args.backend,
+                                               shape=shape):
+            puzzle, solution = Board.from_lists(puzzle), Board.from_lists(solution)
+            sys.stdout.write(f"{puzzle.to_string()} {solution.to_string()}\n")
+            sys.stdout.flush()
+    finally:
+        if index is not None:
+            index.close()
 
 
 if __name__ == "__main__":
-    # Тест генератора
-    generator = SudokuGenerator()
-    puzzle, solution = generator.create_puzzle('medium')
-    print("Puzzle:")
-    for row in puzzle:
-        print(row)
-    print("\nSolution:")
-    for row in solution:
-        print(row)
\ No newline at end of file
+    main()
@@ -1,13 +1,26 @@
+import os
 import tkinter as tk
 import time
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import messagebox
+from bank import PuzzleBank
+from board import ALPHABET, Board
 from generator import SudokuGenerator
-from ui import SudokuUI
+from model import BoardModel
+from prefetch import PuzzlePrefetcher
+from ui import CanvasSudokuUI
 
 
 class SudokuGame:
     """Основной класс игры"""
 
+    # Период опроса фоновой генерации, мс
+    POLL_INTERVAL = 50
+    # Банк заранее сгенерированных головоломок (наполняется bank.py)
+    BANK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'puzzles.bank')
+    # Отрисовщик поля: CanvasSudokuUI или SudokuUI (виджеты Entry)
+    UI_CLASS = CanvasSudokuUI
+
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("Судоку")
@@ -15,16 +28,32 @@ class SudokuGame:
 
         # Инициализация
         self.generator = SudokuGenerator()
-        self.ui = SudokuUI(self.root)
+        # Генератор отдается фоновому потоку, окно его не вызывает
+        self.prefetcher = PuzzlePrefetcher(self.generator)
+        self.bank = PuzzleBank.open_existing(self.BANK_PATH)
+        # Генераторы других размеров доски (создаются по требованию)
+        self.generators = {}
+        # Доски 16x16 и 25x25 создаются в отдельном потоке по одной
+        self.custom_executor = ThreadPoolExecutor(max_workers=1)
+        self.custom_future = None
+        self.custom_key = None
+        # Состояние поля хранит модель, окно только отрисовывает ее
+        self.model = BoardModel()
+        self.ui = self.UI_CLASS(self.root, self.model)
+        self.ui.on_change = self.on_cell_changed
 
         # Данные игры
         self.board = None
         self.solution = None
-        self.user_board = [[0 for _ in range(9)] for _ in range(9)]
+        self.user_board = self.model.values
         self.mistakes = 0
         self.start_time = None
         self.timer_running = False
         self.difficulty = 'medium'
+        # Размер квадрата: 3 - обычная доска 9x9
+        self.box = 3
+        self.waiting_for_puzzle = False
+        self.poll_id = None
 
         # Настройка
         self.setup_menu()
@@ -60,6 +89,14 @@ class SudokuGame:
         difficulty_menu.add_radiobutton(label="Сложная",
                                         command=lambda: self.set_difficulty('hard'))
 
+        # Меню Размер
+        size_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Размер", menu=size_menu)
+        for box in (2, 3, 4, 5):
+            size = box * box
+            size_menu.add_radiobutton(label=f"{size}×{size}",
+                                      command=lambda box=box: self.set_box(box))
+
         # Меню Справка
         help_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Справка", menu=help_menu)
@@ -86,44 +123,129 @@ class SudokuGame:
 
     def on_key_press(self, event):
         """Обработка нажатия клавиш"""
-        if event.char.isdigit() and event.char != '0':
-            self.ui.on_number_click(int(event.char))
+        # Числа больше 9 вводятся буквами: A - 10, B - 11 и т.д.
+        num = ALPHABET.find(event.char.upper().encode('ascii', 'ignore') or b'?')
+        if 1 <= num <= self.model.size:
+            self.ui.on_number_click(num)
         elif event.keysym in ['Delete', 'BackSpace']:
             self.clear_selected_cell()
         elif event.keysym == 'Escape':
-            self.ui.selected_cell = None
+            self.ui.select(None)
 
     def new_game(self):
         """Начать новую игру"""
+        if self.box != 3:
+            self.new_custom_game()
+            return
+
+        # Сначала банк, живая генерация - только если он пуст
+        record = self.bank.draw(self.difficulty) if self.bank is not None else None
+        if record is not None:
+            self.start_game(record.puzzle, record.solution)
+            return
+
+        try:
+            pair = self.prefetcher.take(self.difficulty)
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось создать игру: {str(e)}")
+            return
+
+        if pair is None:
+            # Головоломка еще генерируется: опрашиваем, не блокируя окно
+            if not self.waiting_for_puzzle:
+                self.waiting_for_puzzle = True
+                self.timer_running = False
+                self.timer_label.config(text="Генерация...")
+                self.poll_id = self.root.after(self.POLL_INTERVAL, self.poll_puzzle)
+            return
+
+        puzzle, solution = pair
+        self.start_game(Board.from_lists(puzzle), Board.from_lists(solution))
+
+    def new_custom_game(self):
+        """Новая игра на доске нестандартного размера.
+
+        Банк и фоновая генерация есть только для 9x9. Доска 4x4
+        генерируется прямо в окне, а 16x16 и 25x25 (до полсекунды) - в
+        отдельном потоке: окно опрашивает его, не блокируясь.
+        """
+        generator = self.generators.get(self.box)
+        if generator is None:
+            generator = self.generators[self.box] = SudokuGenerator(box=self.box)
+        if self.box < 3:
+            try:
+                puzzle, solution = generator.create_puzzle(self.difficulty)
+            except Exception as e:
+                messagebox.showerror("Ошибка", f"Не удалось создать игру: {str(e)}")
+                return
+            self.start_game(Board.from_lists(puzzle), Board.from_lists(solution))
+            return
+
+        key = (self.box, self.difficulty)
+        if self.custom_future is not None:
+            if self.custom_key == key:
+                # Такая доска уже генерируется
+                return
+            self.custom_future.cancel()
+        self.custom_key = key
+        self.custom_future = self.custom_executor.submit(generator.create_puzzle,
+                                                         self.difficulty)
+        self.timer_running = False
+        self.timer_label.config(text="Генерация...")
+        self.root.after(self.POLL_INTERVAL, self.poll_custom_game, self.custom_future)
+
+    def poll_puzzle(self):
+        """Проверка готовности головоломки из фонового потока"""
+        self.poll_id = None
+        self.waiting_for_puzzle = False
+        self.new_game()
+
+    def poll_custom_game(self, future):
+        """Проверка готовности большой доски (future - ее генерация)"""
+        if future is not self.custom_future:
+            # Размер или сложность уже сменили
+            return
+        if not future.done():
+            self.root.after(self.POLL_INTERVAL, self.poll_custom_game, future)
+            return
+        self.custom_future = None
+        self.custom_key = None
         try:
-            self.board, self.solution = self.generator.create_puzzle(self.difficulty)
-            self.user_board = [[0 for _ in range(9)] for _ in range(9)]
+            puzzle, solution = future.result()
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось создать игру: {str(e)}")
+            return
+        self.start_game(Board.from_lists(puzzle), Board.from_lists(solution))
+
+    def cancel_pending(self):
+        """Отмена ожидания головоломки прежнего размера"""
+        if self.poll_id is not None:
+            self.root.after_cancel(self.poll_id)
+            self.poll_id = None
+            self.waiting_for_puzzle = False
+        if self.custom_future is not None:
+            self.custom_future.cancel()
+            self.custom_future = None
+            self.custom_key = None
+
+    def start_game(self, puzzle, solution):
+        """Заполнение поля готовой головоломкой (доски - Board)"""
+        try:
+            self.board = puzzle
+            self.solution = solution
+            self.model.load(puzzle, solution)
+            self.user_board = self.model.values
             self.mistakes = 0
             self.mistakes_label.config(text="Ошибок: 0")
 
-            # Заполняем поле
-            for i in range(9):
-                for j in range(9):
-                    cell = self.ui.cells[i][j]
-                    if self.board[i][j] != 0:
-                        cell.delete(0, tk.END)
-                        cell.insert(0, str(self.board[i][j]))
-                        cell.config(bg=self.ui.fixed_color, fg="black")
-                        self.user_board[i][j] = self.board[i][j]
-                    else:
-                        cell.delete(0, tk.END)
-                        bg_color = self.ui.cell_color
-                        if (i // 3 + j // 3) % 2 == 0:
-                            bg_color = "#f5f5f5"
-                        cell.config(bg=bg_color, fg="blue")
+            # Перерисовываются только клетки, вид которых изменился
+            self.ui.render()
 
             # Запускаем таймер
             self.start_time = time.time()
             self.timer_running = True
             self.update_timer()
 
-            self.ui.selected_cell = None
-
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось создать игру: {str(e)}")
 
@@ -132,62 +254,50 @@ class SudokuGame:
         self.difficulty = difficulty
         self.new_game()
 
+    def set_box(self, box):
+        """Установка размера доски"""
+        # Иначе опрос старой генерации заменит новую доску
+        self.cancel_pending()
+        self.box = box
+        self.new_game()
+
     def solve_puzzle(self):
         """Решить головоломку"""
+        if self.solution is None:
+            return
         if messagebox.askyesno("Решить", "Показать решение?"):
-            for i in range(9):
-                for j in range(9):
-                    cell = self.ui.cells[i][j]
-                    cell.delete(0, tk.END)
-                    cell.insert(0, str(self.solution[i][j]))
-                    cell.config(bg=self.ui.fixed_color, fg="green")
+            self.model.reveal_solution()
+            self.user_board = self.model.values
+            self.ui.render()
 
             self.timer_running = False
 
-    def check_solution(self):
-        """Проверить решение"""
-        correct = True
-        for i in range(9):
-            for j in range(9):
-                cell = self.ui.cells[i][j]
-                value = cell.get()
-
-                if value:
-                    try:
-                        num = int(value)
-                        if self.solution and num != self.solution[i][j]:
-                            cell.config(bg=self.ui.error_color)
-                            correct = False
-                            self.mistakes += 1
-                        else:
-                            bg_color = self.ui.cell_color
-                            if (i // 3 + j // 3) % 2 == 0:
-                                bg_color = "#f5f5f5"
-                            cell.config(bg=bg_color)
-                    except ValueError:
-                        cell.config(bg=self.ui.error_color)
-                        correct = False
-
+    def on_cell_changed(self):
+        """Обновление счетчика ошибок после ввода (конфликты уже подсвечены)"""
+        self.mistakes = self.model.mistakes
         self.mistakes_label.config(text=f"Ошибок: {self.mistakes}")
+        if self.model.solved and self.timer_running:
+            self.timer_running = False
+            messagebox.showinfo("Поздравляем", "Головоломка решена!")
 
-        if correct:
+    def check_solution(self):
+        """Проверить решение (конфликты отслеживаются при вводе)"""
+        if self.solution is None:
+            return
+        conflicts = self.model.conflict_count
+        if conflicts:
+            messagebox.showwarning("Проверка", f"Найдены ошибки! Конфликтующих клеток: {conflicts}")
+        elif self.model.empty:
+            messagebox.showinfo("Проверка", f"Ошибок нет, осталось заполнить клеток: {self.model.empty}")
+        else:
             messagebox.showinfo("Проверка", "Все правильно!")
             self.timer_running = False
-        else:
-            messagebox.showwarning("Проверка", f"Найдены ошибки! Ошибок: {self.mistakes}")
 
     def clear_user_input(self):
         """Очистить введенные пользователем данные"""
         if messagebox.askyesno("Очистить", "Очистить все введенные числа?"):
-            for i in range(9):
-                for j in range(9):
-                    if self.board[i][j] == 0:
-                        self.ui.cells[i][j].delete(0, tk.END)
-                        self.user_board[i][j] = 0
-                        bg_color = self.ui.cell_color
-                        if (i // 3 + j // 3) % 2 == 0:
-                            bg_color = "#f5f5f5"
-                        self.ui.cells[i][j].config(bg=bg_color)
+            self.model.clear_user_input()
+            self.ui.render()
 
             self.mistakes = 0
             self.mistakes_label.config(text="Ошибок: 0")
@@ -196,9 +306,8 @@ class SudokuGame:
         """Очистить выбранную ячейку"""
         if self.ui.selected_cell:
             row, col = self.ui.selected_cell
-            if self.board[row][col] == 0:
-                self.ui.cells[row][col].delete(0, tk.END)
-                self.user_board[row][col] = 0
+            if not self.model.is_given(row, col):
+                self.ui.set_number(row, col, 0)
 
     def update_timer(self):
         """Обновление таймера"""
@@ -220,7 +329,7 @@ class SudokuGame:
 
 УПРАВЛЕНИЕ:
 • ЛКМ - выбрать ячейку
-• Цифры 1-9 - ввести число
+• Цифры 1-9 (на досках 16×16 и 25×25 и буквы A-P) - ввести число
 • Delete/BackSpace - очистить ячейку
 • Esc - снять выделение
 • Кнопки управления для дополнительных действий"""
@@ -241,6 +350,10 @@ class SudokuGame:
         """Обработка закрытия окна"""
         if messagebox.askokcancel("Выход", "Вы уверены, что хотите выйти?"):
             self.timer_running = False
+            self.prefetcher.stop()
+            self.custom_executor.shutdown(wait=False, cancel_futures=True)
+            if self.bank is not None:
+                self.bank.close()
             self.root.destroy()
 
     def run(self):
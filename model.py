@@ -0,0 +1,175 @@
+from board import Board
+
+
+class BoardModel:
+    """Состояние игрового поля - единственный источник истины для интерфейса.
+
+    Хранит подсказки, введенные игроком числа (values), конфликты, выделение
+    и признак показанного решения. Каждое изменение отмечает затронутые
+    клетки, а отрисовщик забирает их через take_dirty() и перерисовывает
+    только их. Размер поля берется из загруженной доски (shape).
+
+    Конфликты (одинаковые числа в строке, столбце, области или единице
+    варианта правил) отслеживаются на лету: счетчики чисел по единицам
+    обновляются при каждом вводе, а пересчитываются только клетка и ее
+    соседи с тем же числом.
+    """
+
+    def __init__(self, box=3):
+        self.givens = Board(box=box)
+        self.values = Board(box=box)
+        self.shape = self.givens.shape
+        self.solution = None
+        self.selected = None
+        self.revealed = False
+        # Число вводов, создавших конфликт
+        self.mistakes = 0
+        self.conflicts = set()
+        self._dirty = set(range(self.shape.cells))
+        self._recount()
+
+    @property
+    def size(self):
+        """Сторона поля"""
+        return self.shape.size
+
+    def _recount(self):
+        """Пересчитывает счетчики чисел, конфликты и пустые клетки с нуля"""
+        values = self.values.cells
+        shape = self.shape
+        # Счетчик числа num в единице unit - элемент unit * stride + num
+        self._stride = stride = shape.size + 1
+        self._counts = counts = [0] * (len(shape.units) * stride)
+        for cell in range(shape.cells):
+            if values[cell]:
+                for unit in shape.cell_units[cell]:
+                    counts[unit * stride + values[cell]] += 1
+        conflicts = {cell for cell in range(shape.cells) if self._in_conflict(cell)}
+        self._dirty.update(conflicts ^ self.conflicts)
+        self.conflicts = conflicts
+        self.empty = values.count(0)
+
+    def _in_conflict(self, cell):
+        num = self.values.cells[cell]
+        if not num:
+            return False
+        counts, stride = self._counts, self._stride
+        for unit in self.shape.cell_units[cell]:
+            if counts[unit * stride + num] > 1:
+                return True
+        return False
+
+    def _refresh(self, cell):
+        """Обновляет отметку конфликта клетки"""
+        if self._in_conflict(cell):
+            if cell not in self.conflicts:
+                self.conflicts.add(cell)
+                self._dirty.add(cell)
+        elif cell in self.conflicts:
+            self.conflicts.discard(cell)
+            self._dirty.add(cell)
+
+    def load(self, puzzle, solution):
+        """Новая головоломка (доски - Board)"""
+        if puzzle.shape is not self.shape:
+            # Клетки другого размера перерисовывает новая сетка целиком
+            self.shape = puzzle.shape
+            self.conflicts = set()
+            self._dirty = set()
+        self.givens = puzzle.copy()
+        self.values = puzzle.copy()
+        self.solution = solution
+        self.selected = None
+        self.revealed = False
+        self.mistakes = 0
+        self._dirty.update(range(self.shape.cells))
+        self._recount()
+
+    def is_given(self, row, col):
+        """Клетка - подсказка, ее нельзя менять"""
+        return self.givens.cells[row * self.shape.size + col] != 0
+
+    def set_value(self, row, col, num):
+        """Ставит число игрока (0 - очистить); False, если клетка - подсказка"""
+        cell = row * self.shape.size + col
+        if self.givens.cells[cell]:
+            return False
+        values = self.values.cells
+        old = values[cell]
+        if old == num:
+            return True
+
+        counts, stride = self._counts, self._stride
+        for unit in self.shape.cell_units[cell]:
+            if old:
+                counts[unit * stride + old] -= 1
+            if num:
+                counts[unit * stride + num] += 1
+        values[cell] = num
+        self.empty += (not num) - (not old)
+        self._dirty.add(cell)
+
+        # Конфликт могли получить или потерять только клетки с old или num
+        self._refresh(cell)
+        for peer in self.shape.peers[cell]:
+            value = values[peer]
+            if value and (value == old or value == num):
+                self._refresh(peer)
+        if cell in self.conflicts:
+            self.mistakes += 1
+        return True
+
+    @property
+    def conflict_count(self):
+        """Число клеток, участвующих в конфликтах"""
+        return len(self.conflicts)
+
+    @property
+    def solved(self):
+        """Поле заполнено без конфликтов"""
+        return self.empty == 0 and not self.conflicts
+
+    def clear_user_input(self):
+        """Убирает все числа игрока"""
+        values, givens = self.values.cells, self.givens.cells
+        for cell in range(self.shape.cells):
+            if values[cell] != givens[cell]:
+                values[cell] = givens[cell]
+                self._dirty.add(cell)
+        self.mistakes = 0
+        self._recount()
+
+    def reveal_solution(self):
+        """Показывает решение на всем поле"""
+        self.values = self.solution.copy()
+        self.revealed = True
+        self._dirty.update(range(self.shape.cells))
+        self._recount()
+
+    def select(self, cell):
+        """Выделяет клетку (row, col) или снимает выделение (None)"""
+        if cell == self.selected:
+            return
+        for pos in (self.selected, cell):
+            if pos is not None:
+                self._dirty.add(pos[0] * self.shape.size + pos[1])
+        self.selected = cell
+
+    def style(self, row, col):
+        """Вид клетки: 'error', 'given', 'solved', 'selected' или 'normal'"""
+        cell = row * self.shape.size + col
+        if cell in self.conflicts:
+            return 'error'
+        if self.givens.cells[cell]:
+            return 'given'
+        if self.revealed:
+            return 'solved'
+        if self.selected == (row, col):
+            return 'selected'
+        return 'normal'
+
+    def take_dirty(self):
+        """Номера изменившихся клеток; отметки при этом сбрасываются"""
+        dirty = self._dirty
+        self._dirty = set()
+        return dirty
@@ -0,0 +1,89 @@
+import threading
+from collections import deque
+
+from generator import DIFFICULTIES, GenerationError, SudokuGenerator
+
+
+class PuzzlePrefetcher:
+    """Фоновая генерация головоломок с небольшой очередью на каждую сложность.
+
+    Генерация идет в отдельном потоке, поэтому take() не блокирует
+    вызывающий поток: он либо сразу получает готовую пару
+    (головоломка, решение), либо None, и тогда опрашивает позже.
+    Сложность подтверждается оценкой (create_rated_puzzle). Переданный
+    генератор после этого используется только рабочим потоком.
+    """
+
+    def __init__(self, generator=None, size=2, difficulties=DIFFICULTIES):
+        self.generator = generator or SudokuGenerator()
+        self.size = size
+        self._ready = {difficulty: deque() for difficulty in difficulties}
+        self._errors = {}
+        self._wanted = None
+        self._stopped = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="puzzle-prefetch",
+                                        daemon=True)
+        self._thread.start()
+
+    def take(self, difficulty):
+        """Готовая головоломка или None, если ее еще нет"""
+        with self._condition:
+            ready = self._ready[difficulty]
+            if ready:
+                pair = ready.popleft()
+            else:
+                error = self._errors.pop(difficulty, None)
+                if error is not None:
+                    raise GenerationError(f"Ошибка при создании головоломки: {error}")
+                # Эта сложность нужна прямо сейчас - генерируем ее первой
+                self._wanted = difficulty
+                pair = None
+            self._condition.notify()
+            return pair
+
+    def available(self, difficulty):
+        """Сколько готовых головоломок в очереди"""
+        with self._condition:
+            return len(self._ready[difficulty])
+
+    def stop(self):
+        """Останавливает рабочий поток после текущей генерации"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def _next_difficulty(self):
+        """Сложность, которую пора пополнить, или None"""
+        if self._wanted is not None and not self._ready[self._wanted]:
+            return self._wanted
+        self._wanted = None
+        shortest = min(self._ready, key=lambda difficulty: len(self._ready[difficulty]))
+        if len(self._ready[shortest]) < self.size:
+            return shortest
+        return None
+
+    def _run(self):
+        """Цикл рабочего потока"""
+        while True:
+            with self._condition:
+                difficulty = self._next_difficulty()
+                while difficulty is None and not self._stopped:
+                    self._condition.wait()
+                    difficulty = self._next_difficulty()
+                if self._stopped:
+                    return
+
+            try:
+                pair = self.generator.create_rated_puzzle(difficulty)
+            except Exception as e:
+                with self._condition:
+                    self._errors[difficulty] = e
+                    if self._wanted == difficulty:
+                        self._wanted = None
+                    # Не повторяем сразу: ждем следующего запроса
+                    self._condition.wait()
+                continue
+
+            with self._condition:
+                self._ready[difficulty].append(pair)
@@ -0,0 +1,384 @@
+from itertools import combinations
+
+from board import FULL_MASK, MASK_DIGITS, POPCOUNT, BoardShape
+
+# Вес приемов по шкале, близкой к Sudoku Explainer; приемы
+# применяются в этом порядке, от простых к сложным
+TECHNIQUES = (
+    ('hidden_single', 1.5),
+    ('naked_single', 2.3),
+    ('pointing', 2.6),
+    ('box_line', 2.8),
+    ('naked_pair', 3.0),
+    ('x_wing', 3.2),
+    ('hidden_pair', 3.4),
+    ('naked_triple', 3.6),
+    ('swordfish', 3.8),
+    ('hidden_triple', 4.0),
+)
+WEIGHTS = dict(TECHNIQUES)
+# Оценка головоломки, которую не удалось решить перечисленными приемами
+UNSOLVED_RATING = 10.0
+
+# Геометрия обычной доски 9x9: единицы - строки, столбцы, квадраты
+_SHAPE = BoardShape.of(3)
+UNITS = _SHAPE.units
+ROWS, COLS, BOXES = UNITS[:9], UNITS[9:18], UNITS[18:]
+PEERS = _SHAPE.peers
+CELL_UNITS = _SHAPE.cell_units
+BOX_OF = [box for row in _SHAPE.box_of for box in row]
+# Отрезки квадрата по строкам и по столбцам: (клетки отрезка, клетки той
+# же строки или столбца вне квадрата) - для pointing
+_BOX_ROW_SEGMENTS = [[(tuple(cell for cell in box if cell // 9 == row),
+                       tuple(cell for cell in ROWS[row] if cell not in box))
+                      for row in sorted({cell // 9 for cell in box})]
+                     for box in BOXES]
+_BOX_COL_SEGMENTS = [[(tuple(cell for cell in box if cell % 9 == col),
+                       tuple(cell for cell in COLS[col] if cell not in box))
+                      for col in sorted({cell % 9 for cell in box})]
+                     for box in BOXES]
+# Отрезки строк и столбцов по квадратам: (клетки отрезка, клетки того же
+# квадрата вне линии) - для box_line
+_LINE_SEGMENTS = [[(tuple(cell for cell in line if BOX_OF[cell] == box),
+                    tuple(cell for cell in BOXES[box] if cell not in line))
+                   for box in sorted({BOX_OF[cell] for cell in line})]
+                  for line in ROWS + COLS]
+# Единицы, от кандидатов которых зависит прием: для квадрата (pointing) -
+# он сам и строки и столбцы через него, для строки или столбца
+# (box_line) - она сама и квадраты, через которые она проходит
+_POINTING_DEPS = [(18 + box,) + tuple(sorted({unit for cell in BOXES[box]
+                                              for unit in CELL_UNITS[cell][:2]}))
+                  for box in range(9)]
+_BOX_LINE_DEPS = [(line,) + tuple(sorted({18 + BOX_OF[cell] for cell in UNITS[line]}))
+                  for line in range(18)]
+
+
+class Rating:
+    """Результат оценки: числовая сложность и гистограмма приемов"""
+
+    def __init__(self, rating, histogram, solved):
+        self.rating = rating
+        self.histogram = histogram
+        self.solved = solved
+
+    @property
+    def hardest(self):
+        """Самый сложный примененный прием"""
+        if not self.solved:
+            return None
+        return max(self.histogram, key=WEIGHTS.get, default=None)
+
+    def __repr__(self):
+        return (f"Rating({self.rating}, solved={self.solved}, "
+                f"histogram={self.histogram})")
+
+
+class _Grid:
+    """Кандидаты клеток в виде битовых масок.
+
+    Каждое изменение кандидатов получает следующий номер stamp; он
+    записывается единицам измененной клетки (units) и убранным цифрам
+    (digits). Прием запоминает в clean номер, на котором единица ничего
+    не дала, и пропускает ее, пока ее кандидаты не изменятся: порядок
+    просмотра прежний, поэтому и найденное первым то же самое.
+    """
+
+    __slots__ = ('values', 'cand', 'empty', 'stamp', 'units', 'digits', 'clean')
+
+    def __init__(self, board):
+        self.values = [num for row in board for num in row]
+        self.cand = [FULL_MASK] * 81
+        self.empty = 81
+        self.stamp = 1
+        self.units = [1] * len(UNITS)
+        self.digits = [1] * 10
+        self.clean = {}
+        cand = self.cand
+        for cell, num in enumerate(self.values):
+            if num:
+                if not cand[cell] >> num & 1:
+                    raise ValueError("Доска содержит конфликт")
+                # Все единицы и так считаются измененными, номера не нужны
+                cand[cell] = 0
+                self.empty -= 1
+                bit = ~(1 << num)
+                for peer in PEERS[cell]:
+                    cand[peer] &= bit
+
+    def place(self, cell, num):
+        """Ставит число и убирает его из кандидатов соседей"""
+        self.values[cell] = num
+        self.empty -= 1
+        self.stamp = stamp = self.stamp + 1
+        cand = self.cand
+        units = self.units
+        digits = self.digits
+        for digit in MASK_DIGITS[cand[cell]]:
+            digits[digit] = stamp
+        cand[cell] = 0
+        row, col, box = CELL_UNITS[cell]
+        units[row] = units[col] = units[box] = stamp
+        bit = 1 << num
+        for peer in PEERS[cell]:
+            if cand[peer] & bit:
+                cand[peer] ^= bit
+                row, col, box = CELL_UNITS[peer]
+                units[row] = units[col] = units[box] = stamp
+
+    def eliminate(self, cells, mask):
+        """Убирает mask из кандидатов клеток; True, если что-то изменилось"""
+        cand = self.cand
+        changed = False
+        for cell in cells:
+            removed = cand[cell] & mask
+            if removed:
+                if not changed:
+                    self.stamp += 1
+                    changed = True
+                cand[cell] ^= removed
+                for unit in CELL_UNITS[cell]:
+                    self.units[unit] = self.stamp
+                for digit in MASK_DIGITS[removed]:
+                    self.digits[digit] = self.stamp
+        return changed
+
+    def clean_marks(self, key, count):
+        """Номера, на которых count единиц приема key ничего не дали"""
+        marks = self.clean.get(key)
+        if marks is None:
+            marks = self.clean[key] = [0] * count
+        return marks
+
+
+def _naked_single(grid):
+    """Клетки с единственным кандидатом (все за один проход)"""
+    cand = grid.cand
+    placed = 0
+    for cell in range(81):
+        mask = cand[cell]
+        if mask and POPCOUNT[mask] == 1:
+            grid.place(cell, MASK_DIGITS[mask][0])
+            placed += 1
+    return placed
+
+
+def _hidden_single(grid):
+    """Числа с единственным местом в единице (все за один проход)"""
+    cand = grid.cand
+    units = grid.units
+    clean = grid.clean_marks('hidden_single', len(UNITS))
+    placed = 0
+    for index, unit in enumerate(UNITS):
+        if units[index] <= clean[index]:
+            continue
+        once = twice = 0
+        for cell in unit:
+            mask = cand[cell]
+            twice |= once & mask
+            once |= mask
+        singles = once & ~twice
+        if not singles:
+            clean[index] = grid.stamp
+            continue
+        for num in MASK_DIGITS[singles]:
+            bit = 1 << num
+            for cell in unit:
+                # Кандидат мог исчезнуть после постановки в этом же проходе
+                if cand[cell] & bit:
+                    grid.place(cell, num)
+                    placed += 1
+                    break
+    return placed
+
+
+def _confined(cand, segments):
+    """Числа, которые встречаются только в одном из трех отрезков"""
+    first, second, third = [cand[a] | cand[b] | cand[c] for (a, b, c), _ in segments]
+    return ((first & ~(second | third)) | (second & ~(first | third)) |
+            (third & ~(first | second)))
+
+
+def _repeated(cand, unit):
+    """Числа, у которых в единице хотя бы две клетки"""
+    once = twice = 0
+    for cell in unit:
+        mask = cand[cell]
+        twice |= once & mask
+        once |= mask
+    return twice
+
+
+def _eliminate_confined(grid, num, segments):
+    """Убирает num вне единицы у отрезка, которым он ограничен"""
+    bit = 1 << num
+    cand = grid.cand
+    for cells, outside in segments:
+        if any(cand[cell] & bit for cell in cells):
+            return grid.eliminate(outside, bit)
+    return False
+
+
+def _pointing(grid):
+    """Число в квадрате ограничено одной строкой или столбцом"""
+    cand = grid.cand
+    units = grid.units
+    clean = grid.clean_marks('pointing', 9)
+    for index, box in enumerate(BOXES):
+        if max([units[unit] for unit in _POINTING_DEPS[index]]) <= clean[index]:
+            continue
+        rows, cols = _BOX_ROW_SEGMENTS[index], _BOX_COL_SEGMENTS[index]
+        in_row = _confined(cand, rows)
+        confined = (in_row | _confined(cand, cols)) & _repeated(cand, box)
+        # Числа по возрастанию; сначала строка, затем столбец
+        for num in MASK_DIGITS[confined]:
+            if _eliminate_confined(grid, num, rows if in_row >> num & 1 else cols):
+                return True
+        clean[index] = grid.stamp
+    return False
+
+
+def _box_line(grid):
+    """Число в строке или столбце ограничено одним квадратом"""
+    cand = grid.cand
+    units = grid.units
+    clean = grid.clean_marks('box_line', 18)
+    for index, line in enumerate(UNITS[:18]):
+        if max([units[unit] for unit in _BOX_LINE_DEPS[index]]) <= clean[index]:
+            continue
+        segments = _LINE_SEGMENTS[index]
+        for num in MASK_DIGITS[_confined(cand, segments) & _repeated(cand, line)]:
+            if _eliminate_confined(grid, num, segments):
+                return True
+        clean[index] = grid.stamp
+    return False
+
+
+def _naked_subset(grid, size):
+    """size клеток единицы с size кандидатами на всех"""
+    cand = grid.cand
+    units = grid.units
+    clean = grid.clean_marks(('naked_subset', size), len(UNITS))
+    for index, unit in enumerate(UNITS):
+        if units[index] <= clean[index]:
+            continue
+        cells = [cell for cell in unit if 2 <= POPCOUNT[cand[cell]] <= size]
+        if len(cells) >= size:
+            for group in combinations(cells, size):
+                union = 0
+                for cell in group:
+                    union |= cand[cell]
+                if POPCOUNT[union] == size:
+                    others = [cell for cell in unit if cell not in group]
+                    if grid.eliminate(others, union):
+                        return True
+        clean[index] = grid.stamp
+    return False
+
+
+def _hidden_subset(grid, size):
+    """size чисел единицы, которые помещаются только в size клеток"""
+    cand = grid.cand
+    units = grid.units
+    clean = grid.clean_marks(('hidden_subset', size), len(UNITS))
+    for index, unit in enumerate(UNITS):
+        if units[index] <= clean[index]:
+            continue
+        positions = [0] * 10
+        for pos, cell in enumerate(unit):
+            for num in MASK_DIGITS[cand[cell]]:
+                positions[num] |= 1 << pos
+        places = {num: positions[num] for num in range(1, 10)
+                  if 2 <= POPCOUNT[positions[num]] <= size}
+        if len(places) >= size:
+            for nums in combinations(places, size):
+                union = 0
+                for num in nums:
+                    union |= places[num]
+                if POPCOUNT[union] != size:
+                    continue
+                keep = 0
+                for num in nums:
+                    keep |= 1 << num
+                cells = [unit[pos] for pos in range(9) if union >> pos & 1]
+                if grid.eliminate(cells, FULL_MASK & ~keep):
+                    return True
+        clean[index] = grid.stamp
+    return False
+
+
+def _fish(grid, size):
+    """X-wing (size=2) и swordfish (size=3) по строкам и по столбцам.
+
+    Результат для числа зависит только от его кандидатов, поэтому
+    пропускается число, кандидаты которого не менялись (grid.digits).
+    """
+    cand = grid.cand
+    digits = grid.digits
+    clean = grid.clean_marks(('fish', size), 20)
+    for orientation, (bases, covers) in enumerate(((ROWS, COLS), (COLS, ROWS))):
+        # Позиции каждого числа в каждой базовой линии (по запросу)
+        table = None
+        for num in range(1, 10):
+            mark = orientation * 10 + num
+            if digits[num] <= clean[mark]:
+                continue
+            if table is None:
+                table = [[0] * 9 for _ in range(10)]
+                for index, line in enumerate(bases):
+                    for pos, cell in enumerate(line):
+                        for digit in MASK_DIGITS[cand[cell]]:
+                            table[digit][index] |= 1 << pos
+            bit = 1 << num
+            lines = {index: positions for index, positions in enumerate(table[num])
+                     if 2 <= POPCOUNT[positions] <= size}
+            if len(lines) >= size:
+                for group in combinations(lines, size):
+                    union = 0
+                    for index in group:
+                        union |= lines[index]
+                    if POPCOUNT[union] != size:
+                        continue
+                    cells = [cell for pos in range(9) if union >> pos & 1
+                             for index, cell in enumerate(covers[pos])
+                             if index not in group]
+                    if grid.eliminate(cells, bit):
+                        return True
+            clean[mark] = grid.stamp
+    return False
+
+
+_STEPS = (
+    ('hidden_single', _hidden_single),
+    ('naked_single', _naked_single),
+    ('pointing', _pointing),
+    ('box_line', _box_line),
+    ('naked_pair', lambda grid: _naked_subset(grid, 2)),
+    ('x_wing', lambda grid: _fish(grid, 2)),
+    ('hidden_pair', lambda grid: _hidden_subset(grid, 2)),
+    ('naked_triple', lambda grid: _naked_subset(grid, 3)),
+    ('swordfish', lambda grid: _fish(grid, 3)),
+    ('hidden_triple', lambda grid: _hidden_subset(grid, 3)),
+)
+
+
+def rate_puzzle(board):
+    """Оценивает сложность головоломки логическими приемами.
+
+    Каждый шаг применяет самый простой прием, который что-то дает
+    (одиночки ставятся сразу все, найденные за проход).
+    Оценка - вес самого сложного понадобившегося приема, гистограмма -
+    сколько раз применялся каждый прием. Если приемов не хватило,
+    оценка равна UNSOLVED_RATING.
+    """
+    grid = _Grid(board)
+    histogram = {}
+    while grid.empty:
+        for name, step in _STEPS:
+            applied = step(grid)
+            if applied:
+                histogram[name] = histogram.get(name, 0) + applied
+                break
+        else:
+            return Rating(UNSOLVED_RATING, histogram, False)
+    rating = max((WEIGHTS[name] for name in histogram), default=0.0)
+    return Rating(rating, histogram, True)
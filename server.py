@@ -0,0 +1,376 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import generator
+from board import Board
+from generator import DIFFICULTIES, ConstraintState, _init_worker, make_puzzle_id
+from timing import percentile
+
+logger = logging.getLogger(__name__)
+
+
+# Сколько последних задержек хранится для перцентилей /stats
+LATENCY_WINDOW = 1000
+# Предел размера тела запроса, байт
+MAX_BODY = 64 * 1024
+# Пауза после ошибки генерации, с; удваивается до REFILL_BACKOFF_MAX
+REFILL_BACKOFF = 0.5
+REFILL_BACKOFF_MAX = 30.0
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 413: 'Payload Too Large',
+           414: 'URI Too Long', 422: 'Unprocessable Entity',
+           503: 'Service Unavailable'}
+
+
+class HTTPError(Exception):
+    """Ответ с кодом ошибки и сообщением в JSON"""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def _generate(difficulty, rated):
+    """Головоломка со случайным зерном, чтобы у нее был идентификатор.
+
+    Генератор процесса пула (generator._init_worker) с настройками по
+    умолчанию, иначе puzzle_from_id не восстановит головоломку по id.
+    """
+    worker = generator._worker_generator
+    seed = worker.rng.getrandbits(48)
+    worker.rng.seed(seed)
+    if rated:
+        puzzle, solution = worker.create_rated_puzzle(difficulty)
+    else:
+        puzzle, solution = worker.create_puzzle(difficulty)
+    return {
+        'id': make_puzzle_id(seed, difficulty, rated=rated).hex(),
+        'difficulty': difficulty,
+        'puzzle': Board.from_lists(puzzle).to_string(),
+        'solution': Board.from_lists(solution).to_string(),
+    }
+
+
+def _solve(text):
+    """Решение и признак единственности; (None, False), если решения нет"""
+    board = Board.from_string(text).to_lists()
+    solutions = []
+    for solution in generator._worker_generator.iter_solutions(board):
+        solutions.append(solution)
+        if len(solutions) == 2:
+            break
+    if not solutions:
+        return None, False
+    return Board.from_lists(solutions[0]).to_string(), len(solutions) == 1
+
+
+class PuzzleServer:
+    """HTTP/JSON-сервер головоломок на asyncio.
+
+    Для каждой сложности держится пул готовых головоломок, который
+    в фоне пополняет пул процессов, поэтому в задержку запроса время
+    генерации не входит. Когда пул пуст, запрос ждет не дольше
+    wait_timeout секунд, а ожидающих не больше max_waiters на
+    сложность; сверх этого сервер сразу отвечает 503 с Retry-After.
+    Решение (/solve) идет в отдельном пуле из solve_workers процессов,
+    чтобы не ждать в очереди за пополнением пулов; если оно дольше
+    solve_timeout секунд, ответ 503 (процесс при этом дорешивает).
+
+    GET /puzzle?difficulty=  - головоломка, решение и 8-байтовый id
+    POST /solve              - {"puzzle": "..."} -> решение
+    POST /validate           - {"board": "..."} -> нет ли конфликтов, заполнена ли
+    GET /stats               - попадания в пул и перцентили задержек
+    """
+
+    def __init__(self, pool_sizes=None, workers=None, rated=False,
+                 wait_timeout=2.0, max_waiters=64, solve_workers=1,
+                 solve_timeout=10.0):
+        self.pool_sizes = {difficulty: 10 for difficulty in DIFFICULTIES}
+        self.pool_sizes.update(pool_sizes or {})
+        self.workers = workers or os.cpu_count() or 1
+        self.rated = rated
+        self.wait_timeout = wait_timeout
+        self.max_waiters = max_waiters
+        self.solve_workers = solve_workers
+        self.solve_timeout = solve_timeout
+        self.pools = {}
+        self.waiters = {difficulty: 0 for difficulty in DIFFICULTIES}
+        self.counters = {'requests': 0, 'hits': 0, 'misses': 0, 'rejected': 0,
+                         'generation_errors': 0}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.port = None
+        self._server = None
+        self._executor = None
+        self._solver = None
+        self._fillers = []
+
+    async def start(self, host='127.0.0.1', port=8080):
+        """Запускает пул процессов, пополнение пулов и прием соединений"""
+        self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                             initializer=_init_worker, initargs=({},))
+        self._solver = ProcessPoolExecutor(max_workers=self.solve_workers,
+                                           initializer=_init_worker, initargs=({},))
+        # Процессы создаются при первой задаче: пусть это будет до приема
+        # соединений, иначе дочерний процесс унаследует сокет клиента
+        await asyncio.wrap_future(self._solver.submit(os.getpid))
+        for difficulty, size in self.pool_sizes.items():
+            # Очередь с пределом: заполнитель ждет на put, пока пул полон
+            self.pools[difficulty] = asyncio.Queue(maxsize=size)
+            for _ in range(min(self.workers, size)):
+                self._fillers.append(asyncio.create_task(self._refill(difficulty)))
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Останавливает прием соединений и генерацию"""
+        for task in self._fillers:
+            task.cancel()
+        await asyncio.gather(*self._fillers, return_exceptions=True)
+        self._fillers.clear()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for executor in (self._executor, self._solver):
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def _refill(self, difficulty):
+        """Пополняет пул сложности, пока сервер работает.
+
+        Ошибка генерации не останавливает пополнение: она пишется в лог,
+        и после паузы (растущей, пока ошибки идут подряд) генерация
+        повторяется.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self.pools[difficulty]
+        backoff = REFILL_BACKOFF
+        while True:
+            try:
+                item = await loop.run_in_executor(self._executor, _generate,
+                                                  difficulty, self.rated)
+            except Exception:
+                self.counters['generation_errors'] += 1
+                logger.exception("Не удалось сгенерировать головоломку (%s), "
+                                 "повтор через %.1f с", difficulty, backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, REFILL_BACKOFF_MAX)
+                continue
+            backoff = REFILL_BACKOFF
+            await pool.put(item)
+
+    async def _handle(self, reader, writer):
+        """Соединение: запросы по одному, пока клиент держит keep-alive"""
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                except ValueError:
+                    # Строка длиннее буфера потока (64 КБ): _respond ответит 414
+                    request_line = None
+                if request_line == b'':
+                    break
+                start = time.perf_counter()
+                keep_alive = await self._respond(request_line, reader, writer)
+                await writer.drain()
+                self.latencies.append(time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, request_line, reader, writer):
+        """Читает один запрос и пишет ответ; True, если соединение остается"""
+        self.counters['requests'] += 1
+        keep_alive = False
+        try:
+            if request_line is None:
+                raise HTTPError(414, "Слишком длинная строка запроса")
+            try:
+                method, target, version = request_line.decode('latin-1').split()
+            except ValueError:
+                raise HTTPError(400, "Некорректная строка запроса")
+            headers = {}
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    raise HTTPError(400, "Слишком длинный заголовок")
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            keep_alive = (version == 'HTTP/1.1' and
+                          headers.get('connection', '').lower() != 'close')
+
+            try:
+                length = int(headers.get('content-length') or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                keep_alive = False
+                raise HTTPError(400, "Некорректный Content-Length")
+            if length > MAX_BODY:
+                keep_alive = False
+                raise HTTPError(413, "Слишком большое тело запроса")
+            body = await reader.readexactly(length) if length else b''
+
+            status, payload, extra = 200, await self._route(method, target, body), {}
+        except HTTPError as e:
+            status, payload, extra = e.status, {'error': str(e)}, e.headers
+
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = [f"HTTP/1.1 {status} {REASONS[status]}",
+                "Content-Type: application/json; charset=utf-8",
+                f"Content-Length: {len(data)}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        head += [f"{name}: {value}" for name, value in extra.items()]
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + data)
+        return keep_alive
+
+    async def _route(self, method, target, body):
+        url = urlsplit(target)
+        routes = {
+            '/puzzle': ('GET', self._get_puzzle),
+            '/solve': ('POST', self._post_solve),
+            '/validate': ('POST', self._post_validate),
+            '/stats': ('GET', self._get_stats),
+        }
+        if url.path not in routes:
+            raise HTTPError(404, f"Нет такого пути: {url.path}")
+        expected, handler = routes[url.path]
+        if method != expected:
+            raise HTTPError(405, f"Ожидался метод {expected}")
+        if method == 'GET':
+            query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            return await handler(query)
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            raise HTTPError(400, "Тело запроса должно быть JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Тело запроса должно быть JSON-объектом")
+        return await handler(data)
+
+    async def _get_puzzle(self, query):
+        difficulty = query.get('difficulty', 'medium')
+        pool = self.pools.get(difficulty)
+        if pool is None:
+            raise HTTPError(400, f"Недопустимая сложность: {difficulty}")
+        if not pool.empty():
+            self.counters['hits'] += 1
+            return pool.get_nowait()
+
+        # Пул пуст: ждем немного, но не копим бесконечную очередь
+        retry = {'Retry-After': str(max(1, round(self.wait_timeout)))}
+        if self.waiters[difficulty] >= self.max_waiters:
+            self.counters['rejected'] += 1
+            raise HTTPError(503, "Пул головоломок пуст", retry)
+        self.waiters[difficulty] += 1
+        try:
+            item = await asyncio.wait_for(pool.get(), self.wait_timeout)
+        except asyncio.TimeoutError:
+            self.counters['rejected'] += 1
+            raise HTTPError(503, "Пул головоломок пуст", retry)
+        finally:
+            self.waiters[difficulty] -= 1
+        self.counters['misses'] += 1
+        return item
+
+    @staticmethod
+    def _board(data, field):
+        """Доска 9x9 из строкового поля тела запроса"""
+        try:
+            board = Board.from_string(data[field])
+        except (KeyError, TypeError, ValueError, AttributeError):
+            board = None
+        if board is None or board.size != 9:
+            raise HTTPError(400, f"Поле {field} должно быть строкой доски 9x9")
+        return board
+
+    async def _post_solve(self, data):
+        board = self._board(data, 'puzzle')
+        loop = asyncio.get_running_loop()
+        try:
+            solution, unique = await asyncio.wait_for(
+                loop.run_in_executor(self._solver, _solve, board.to_string()),
+                self.solve_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPError(503, "Решение заняло слишком много времени")
+        if solution is None:
+            raise HTTPError(422, "У головоломки нет решения")
+        return {'solution': solution, 'unique': unique}
+
+    async def _post_validate(self, data):
+        board = self._board(data, 'board')
+        valid = ConstraintState.from_board(board.to_lists()) is not None
+        return {'valid': valid, 'complete': valid and board.count_empty() == 0}
+
+    async def _get_stats(self, query):
+        counters = self.counters
+        served = counters['hits'] + counters['misses'] + counters['rejected']
+        latencies = list(self.latencies)
+        return {
+            **counters,
+            'hit_rate': counters['hits'] / served if served else None,
+            'latency_ms': {
+                name: percentile(latencies, q) * 1000 if latencies else None
+                for name, q in (('p50', 50), ('p95', 95), ('p99', 99))
+            },
+            'pools': {difficulty: pool.qsize() for difficulty, pool in self.pools.items()},
+        }
+
+
+def main(argv=None):
+    """Сервер головоломок: python server.py --port 8080 --pool-size 20"""
+    parser = argparse.ArgumentParser(description="HTTP-сервер головоломок Судоку")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--pool-size', type=int, default=10,
+                        help="готовых головоломок на каждую сложность")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="число процессов (по умолчанию - число ядер)")
+    parser.add_argument('--solve-workers', type=int, default=1,
+                        help="процессов для решения головоломок (/solve)")
+    parser.add_argument('--solve-timeout', type=float, default=10.0,
+                        help="сколько секунд ждать решения (/solve)")
+    parser.add_argument('--wait', type=float, default=2.0,
+                        help="сколько секунд запрос ждет пустой пул")
+    parser.add_argument('--rated', action='store_true',
+                        help="подтверждать сложность оценкой по приемам решения")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    async def run():
+        server = PuzzleServer({difficulty: args.pool_size for difficulty in DIFFICULTIES},
+                              workers=args.workers, rated=args.rated,
+                              wait_timeout=args.wait,
+                              solve_workers=args.solve_workers,
+                              solve_timeout=args.solve_timeout)
+        await server.start(args.host, args.port)
+        print(f"Сервер слушает http://{args.host}:{server.port}")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
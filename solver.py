@@ -0,0 +1,215 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import closing
+from itertools import islice
+
+from board import Board
+from generator import SudokuGenerator
+from timing import percentile
+
+
+# Головоломок в одной задаче пула: меньше накладных расходов на передачу
+BATCH = 32
+
+
+class SolveResult:
+    """Результат решения одной головоломки из потока.
+
+    solutions - сколько решений найдено (0, 1 или 2 - "больше одного"),
+    solution - первое найденное решение строкой или None, seconds - время
+    решения, error - сообщение, если строку не удалось разобрать.
+    """
+
+    __slots__ = ('line', 'puzzle', 'solution', 'solutions', 'seconds', 'error')
+
+    def __init__(self, line, puzzle, solution=None, solutions=0, seconds=0.0,
+                 error=None):
+        self.line = line
+        self.puzzle = puzzle
+        self.solution = solution
+        self.solutions = solutions
+        self.seconds = seconds
+        self.error = error
+
+    def __repr__(self):
+        return (f"SolveResult(line={self.line}, solutions={self.solutions}, "
+                f"seconds={self.seconds:.4f})")
+
+
+# Решатели процесса пула по размеру квадрата и их настройки
+_worker_solvers = {}
+_worker_options = {}
+
+
+def _init_solver(options):
+    global _worker_options
+    _worker_options = options
+    _worker_solvers.clear()
+
+
+def _solve_one(line, text):
+    """Решает одну головоломку в процессе пула (не больше двух решений)"""
+    start = time.perf_counter()
+    try:
+        board = Board.from_string(text)
+        solver = _worker_solvers.get(board.shape.box)
+        if solver is None:
+            solver = _worker_solvers[board.shape.box] = SudokuGenerator(
+                box=board.shape.box, **_worker_options)
+        with closing(solver.iter_solutions(board.to_lists())) as solutions:
+            found = list(islice(solutions, 2))
+    except ValueError as e:
+        return SolveResult(line, text, error=str(e))
+    solution = Board.from_lists(found[0]).to_string() if found else None
+    return SolveResult(line, text, solution, len(found), time.perf_counter() - start)
+
+
+def _solve_batch(items):
+    return [_solve_one(line, text) for line, text in items]
+
+
+def _read_puzzles(lines):
+    """Пары (номер строки, головоломка); пустые строки и '#'-комментарии пропускаются"""
+    for number, line in enumerate(lines, 1):
+        text = line.strip()
+        if text and not text.startswith('#'):
+            yield number, text
+
+
+def solve_stream(lines, workers=None, batch=BATCH, window=None, **options):
+    """Решает головоломки из потока строк в пуле процессов.
+
+    lines - любой итерируемый источник строк (файл, sys.stdin, список),
+    по головоломке на строку в формате Board.from_string. Результаты
+    (SolveResult) выдаются в порядке входа. Строки читаются лениво,
+    а в полете и в буфере переупорядочивания держится не больше window
+    задач по batch головоломок, поэтому память не зависит от размера
+    входа: пока самая ранняя задача не готова, новые не отправляются.
+    options передаются в конструктор SudokuGenerator каждого процесса.
+    """
+    workers = workers or os.cpu_count() or 1
+    window = window or workers * 4
+    puzzles = _read_puzzles(lines)
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_solver,
+                               initargs=(options,))
+    pending = {}
+    ready = {}
+    submitted = emitted = 0
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and submitted - emitted < window:
+                items = list(islice(puzzles, batch))
+                if not items:
+                    exhausted = True
+                    break
+                pending[pool.submit(_solve_batch, items)] = submitted
+                submitted += 1
+            if emitted == submitted:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                ready[pending.pop(future)] = future.result()
+            # Выдаем готовые задачи по порядку; более поздние ждут в ready
+            while emitted in ready:
+                yield from ready.pop(emitted)
+                emitted += 1
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+class SolveSummary:
+    """Итоги решения потока: числа головоломок по исходам и времена"""
+
+    def __init__(self):
+        self.total = 0
+        self.unique = 0
+        self.no_solution = 0
+        self.multiple = 0
+        self.invalid = 0
+        self.times = []
+
+    def add(self, result):
+        self.total += 1
+        if result.error is not None:
+            self.invalid += 1
+            return
+        self.times.append(result.seconds)
+        if result.solutions == 0:
+            self.no_solution += 1
+        elif result.solutions == 1:
+            self.unique += 1
+        else:
+            self.multiple += 1
+
+    def as_dict(self):
+        times = self.times
+        return {
+            'total': self.total,
+            'unique': self.unique,
+            'no_solution': self.no_solution,
+            'multiple': self.multiple,
+            'invalid': self.invalid,
+            **{f'{name}_ms': percentile(times, q) * 1000 if times else None
+               for name, q in (('p50', 50), ('p95', 95), ('max', 100))},
+        }
+
+
+def main(argv=None):
+    """Пакетное решение: python solver.py puzzles.txt > solutions.txt"""
+    parser = argparse.ArgumentParser(description="Пакетный решатель Судоку")
+    parser.add_argument('input', nargs='?', default='-',
+                        help="файл с головоломками по одной на строку ('-' - stdin)")
+    parser.add_argument('-o', '--output', default='-',
+                        help="файл для решений ('-' - stdout)")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="число процессов (по умолчанию - число ядер)")
+    parser.add_argument('--backend', choices=SudokuGenerator.BACKENDS,
+                        default='backtracking')
+    parser.add_argument('--times', action='store_true',
+                        help="дописывать к решению время в миллисекундах")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    target = (sys.stdout if args.output == '-'
+              else open(args.output, 'w', encoding='utf-8'))
+    summary = SolveSummary()
+    start = time.perf_counter()
+    try:
+        for result in solve_stream(source, args.workers, backend=args.backend):
+            summary.add(result)
+            if result.error is not None:
+                print(f"Строка {result.line}: {result.error}", file=sys.stderr)
+            elif result.solutions != 1:
+                print(f"Строка {result.line}: "
+                      f"{'нет решения' if not result.solutions else 'больше одного решения'}",
+                      file=sys.stderr)
+            # Пустая строка вместо решения сохраняет соответствие строк входа
+            line = result.solution or ''
+            if args.times:
+                line += f"\t{result.seconds * 1000:.3f}"
+            target.write(line + '\n')
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+    elapsed = time.perf_counter() - start
+    report = summary.as_dict()
+    print(f"Головоломок: {report['total']}, единственное решение: {report['unique']}, "
+          f"нет решения: {report['no_solution']}, больше одного: {report['multiple']}, "
+          f"некорректных строк: {report['invalid']}", file=sys.stderr)
+    if summary.times:
+        print(f"Время на головоломку, мс: p50 {report['p50_ms']:.2f}, "
+              f"p95 {report['p95_ms']:.2f}, max {report['max_ms']:.2f}; "
+              f"всего {elapsed:.2f} с ({report['total'] / elapsed:.1f} в секунду)",
+              file=sys.stderr)
+    return 0 if report['total'] == report['unique'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+import random
+from itertools import permutations
+
+
+def _random_line_order(rng):
+    """Случайная перестановка 9 линий: полосы и линии внутри полос"""
+    bands = [0, 1, 2]
+    rng.shuffle(bands)
+    order = []
+    for band in bands:
+        lines = [band * 3, band * 3 + 1, band * 3 + 2]
+        rng.shuffle(lines)
+        order.extend(lines)
+    return order
+
+
+class SudokuTransform:
+    """Преобразование из группы симметрий судоку.
+
+    Переименование цифр, перестановка полос/стеков, строк/столбцов
+    внутри них и транспонирование сохраняют и правильность решения,
+    и единственность решения головоломки.
+    """
+
+    __slots__ = ('digits', 'rows', 'cols', 'transpose')
+
+    def __init__(self, digits, rows, cols, transpose=False):
+        # digits[num] - новое число для num, digits[0] == 0
+        self.digits = digits
+        # rows[i] - строка исходной доски, которая станет строкой i
+        self.rows = rows
+        self.cols = cols
+        self.transpose = transpose
+
+    @classmethod
+    def identity(cls):
+        """Тождественное преобразование"""
+        return cls(list(range(10)), list(range(9)), list(range(9)))
+
+    @classmethod
+    def random(cls, rng=random):
+        """Случайное преобразование"""
+        digits = list(range(1, 10))
+        rng.shuffle(digits)
+        return cls([0] + digits, _random_line_order(rng),
+                   _random_line_order(rng), rng.random() < 0.5)
+
+    def apply(self, board):
+        """Применяет преобразование к доске, возвращая новую доску"""
+        digits = self.digits
+        source = list(zip(*board)) if self.transpose else board
+        return [[digits[line[col]] for col in self.cols]
+                for line in (source[row] for row in self.rows)]
+
+
+def equivalent_puzzles(puzzle, solution, count, rng=random):
+    """Выдает count различных пар (головоломка, решение), равносильных данной.
+
+    Единственность решения сохраняется преобразованием, поэтому
+    повторная проверка не нужна. Исходная пара не выдается.
+    """
+    seen = {str(puzzle)}
+    produced = 0
+    # Группа содержит ~1.2e12 элементов, поэтому повторы редки;
+    # ограничение защищает от очень симметричных головоломок
+    attempts = count * 10
+    while produced < count and attempts > 0:
+        attempts -= 1
+        transform = SudokuTransform.random(rng)
+        new_puzzle = transform.apply(puzzle)
+        key = str(new_puzzle)
+        if key in seen:
+            continue
+        seen.add(key)
+        produced += 1
+        yield new_puzzle, transform.apply(solution)
+
+
+def _all_line_orders():
+    """Все 1296 перестановок линий, сохраняющих полосы"""
+    orders = []
+    for bands in permutations(range(3)):
+        for first in permutations(range(3)):
+            for second in permutations(range(3)):
+                for third in permutations(range(3)):
+                    inner = (first, second, third)
+                    orders.append(tuple(bands[i] * 3 + inner[i][k]
+                                        for i in range(3) for k in range(3)))
+    return orders
+
+
+LINE_ORDERS = _all_line_orders()
+
+
+def _relabel(line, order, labels, assigned):
+    """Переписывает линию в порядке order, нумеруя новые числа по появлению"""
+    labels = labels[:]
+    out = []
+    for col in order:
+        num = line[col]
+        if num:
+            label = labels[num]
+            if not label:
+                assigned += 1
+                label = labels[num] = assigned
+            out.append(label)
+        else:
+            out.append(0)
+    return tuple(out), labels, assigned
+
+
+def canonical_form(board):
+    """Минимальный представитель класса доски относительно группы симметрий.
+
+    Минимум берется в лексикографическом порядке строки из 81 символа
+    (0 - пустая клетка). Строки доски выбираются по одной, а для каждого
+    префикса хранятся только варианты с минимальным префиксом.
+    """
+    states = []
+    best = None
+    for grid in (board, [list(col) for col in zip(*board)]):
+        for row in range(9):
+            line = grid[row]
+            for order in LINE_ORDERS:
+                out, labels, assigned = _relabel(line, order, [0] * 10, 0)
+                if best is None or out < best:
+                    best = out
+                    states = []
+                if out == best:
+                    states.append((grid, order, labels, assigned,
+                                   (row,), row // 3))
+    result = [best]
+
+    for position in range(1, 9):
+        best = None
+        next_states = []
+        for grid, order, labels, assigned, used, band in states:
+            if position % 3 == 0:
+                used_bands = {row // 3 for row in used}
+                rows = [row for row in range(9) if row // 3 not in used_bands]
+            else:
+                rows = [row for row in range(band * 3, band * 3 + 3)
+                        if row not in used]
+            for row in rows:
+                out, new_labels, new_assigned = _relabel(grid[row], order,
+                                                         labels, assigned)
+                if best is None or out < best:
+                    best = out
+                    next_states = []
+                if out == best:
+                    next_states.append((grid, order, new_labels, new_assigned,
+                                        used + (row,), row // 3))
+        states = next_states
+        result.append(best)
+
+    return [list(line) for line in result]
+
+
+def canonical_key(board):
+    """Каноническая форма доски в виде строки из 81 символа"""
+    return ''.join(str(num) for line in canonical_form(board) for num in line)
@@ -1,5 +1,32 @@
+import asyncio
+import gc
+import json
+import os
+import pickle
+import tempfile
+import time
 import unittest
-from src.generator import SudokuGenerator
+from unittest.mock import patch
+from generator import (SudokuGenerator, ConstraintState, GenerationError,
+                       generate_batch, is_valid_board, make_puzzle_id, parse_puzzle_id,
+                       puzzle_from_id, _check_still_valid)
+from symmetry import SudokuTransform, canonical_key
+from dedup import DedupIndex
+from board import Board, BoardShape
+from prefetch import PuzzlePrefetcher
+from rating import rate_puzzle
+from bank import PuzzleBank
+from bench import compare
+from model import BoardModel
+from server import PuzzleServer
+from solver import SolveSummary, solve_stream
+from timing import percentile
+from validator import audit_bank, np, validate_boards
+
+
+def _failing_generate(difficulty, rated):
+    """Генерация для процесса пула сервера, которая всегда падает"""
+    raise GenerationError("Сбой генерации")
 
 
 class TestSudokuGenerator(unittest.TestCase):
@@ -49,6 +76,561 @@ class TestSudokuGenerator(unittest.TestCase):
             else:  # hard
                 self.assertGreaterEqual(empty_cells, 55)
 
+    def test_constraint_state(self):
+        """Тест битовых масок ограничений"""
+        board = self.generator.generate_full_board()
+        state = ConstraintState.from_board(board)
+        self.assertIsNotNone(state)
+
+        num = board[4][4]
+        self.assertFalse(state.can_place(4, 4, num))
+        state.unplace(4, 4, num)
+        self.assertTrue(state.can_place(4, 4, num))
+        self.assertEqual(state.candidate_count(4, 4), 1)
+
+        board[0][0] = board[0][1]
+        self.assertIsNone(ConstraintState.from_board(board))
+        copy = [row[:] for row in board]
+        self.assertFalse(is_valid_board(board))
+        self.assertEqual(board, copy)
+
+    def test_unique_solution(self):
+        """Тест проверки единственности решения"""
+        board = self.generator.generate_full_board()
+        puzzle = [row[:] for row in board]
+        puzzle[0][0] = 0
+        self.assertTrue(self.generator.has_unique_solution(puzzle))
+        self.assertEqual(puzzle[0][0], 0)
+
+        empty = [[0 for _ in range(9)] for _ in range(9)]
+        self.assertFalse(self.generator.has_unique_solution(empty))
+
+    def test_other_solution(self):
+        """Тест проверки единственности через поиск другого решения"""
+        for backend in SudokuGenerator.BACKENDS:
+            generator = SudokuGenerator(backend=backend, seed=3)
+            puzzle, solution = generator.create_puzzle('hard')
+            for row in range(9):
+                for col in range(9):
+                    num = puzzle[row][col]
+                    if not num:
+                        continue
+                    puzzle[row][col] = 0
+                    other = generator.has_other_solution(puzzle, row, col, num, solution)
+                    self.assertEqual(other, not generator.has_unique_solution(puzzle))
+                    puzzle[row][col] = num
+
+    def test_search_modes(self):
+        """Тест режимов перебора и счетчика узлов"""
+        puzzle, solution = self.generator.create_puzzle('medium')
+        for search in SudokuGenerator.SEARCH_MODES:
+            generator = SudokuGenerator(search=search)
+            generator.board = [row[:] for row in puzzle]
+            self.assertTrue(generator.solve_board())
+            self.assertEqual(generator.board, solution)
+            self.assertGreater(generator.nodes, 0)
+
+        with self.assertRaises(ValueError):
+            SudokuGenerator(search='bfs')
+        with self.assertRaises(ValueError):
+            SudokuGenerator(search='linear', box=4)
+
+    def test_board_sizes(self):
+        """Тест досок 4x4, 16x16 и 25x25"""
+        for box in (2, 4):
+            generator = SudokuGenerator(box=box)
+            size = box * box
+            puzzle, solution = generator.create_puzzle('medium')
+            self.assertEqual(len(puzzle), size)
+            self.assertEqual(sorted(solution[0]), list(range(1, size + 1)))
+            self.assertEqual(sorted(row[0] for row in solution), list(range(1, size + 1)))
+            self.assertTrue(generator.has_unique_solution(puzzle))
+            self.assertEqual(list(generator.iter_solutions(puzzle)), [solution])
+
+            board = Board.from_lists(puzzle)
+            self.assertEqual(board.size, size)
+            self.assertEqual(Board.from_string(board.to_string()), board)
+
+        # Глубина перебора 625 клеток больше предела рекурсии
+        generator = SudokuGenerator(box=5)
+        solution = generator.generate_full_board()
+        self.assertEqual(sorted(solution[24]), list(range(1, 26)))
+        with self.assertRaises(ValueError):
+            generator.create_rated_puzzle('hard')
+
+    def test_board_variants(self):
+        """Тест вариантов правил: X-судоку, виндоку и пазл-судоку"""
+        layout = ("111222233" "111222333" "114223333"
+                  "144555666" "444555666" "444555666"
+                  "778888999" "777888999" "777788999")
+        shapes = (BoardShape.variant('x'), BoardShape.variant('windoku'),
+                  BoardShape.jigsaw(layout))
+        for shape in shapes:
+            generator = SudokuGenerator(shape=shape, seed=3)
+            puzzle, solution = generator.create_puzzle('hard')
+            for unit in shape.units:
+                self.assertEqual(sorted(solution[cell // 9][cell % 9] for cell in unit),
+                                 list(range(1, 10)))
+            self.assertTrue(generator.has_unique_solution(puzzle))
+            self.assertEqual(list(generator.iter_solutions(puzzle)), [solution])
+            self.assertTrue(is_valid_board(solution, shape))
+            self.assertIs(pickle.loads(pickle.dumps(shape)), shape)
+
+        # Проверки в пуле получают тот же вариант правил
+        with SudokuGenerator(shape=shapes[0], seed=3, check_workers=2) as parallel, \
+                patch('generator._available_cpus', return_value=2):
+            self.assertEqual(parallel.create_puzzle('medium'),
+                             SudokuGenerator(shape=shapes[0], seed=3).create_puzzle('medium'))
+
+        # Одинаковые числа на диагонали - конфликт только в X-судоку
+        board = [[0] * 9 for _ in range(9)]
+        board[0][0] = board[8][8] = 1
+        self.assertTrue(is_valid_board(board))
+        self.assertFalse(is_valid_board(board, shapes[0]))
+        self.assertFalse(SudokuGenerator(shape=shapes[0]).is_valid_in_board(board, 4, 4, 1))
+        model = BoardModel()
+        model.load(Board.from_lists(board, shapes[0]), Board(shape=shapes[0]))
+        self.assertEqual(model.conflicts, {0, 80})
+        with self.assertRaises(ValueError):
+            SudokuGenerator(shape=shapes[1], backend='dlx')
+
+        # Область из строки без одной клетки и клетки под ней: решения нет
+        with self.assertRaises(GenerationError):
+            SudokuGenerator(shape=BoardShape.jigsaw("aaab" "bbba" "cccc" "dddd")
+                            ).generate_full_board()
+
+    def test_seeded_generation(self):
+        """Тест воспроизводимости по зерну и идентификатора головоломки"""
+        first = SudokuGenerator(seed=42).create_puzzle('hard')
+        self.assertEqual(SudokuGenerator(seed=42).create_puzzle('hard'), first)
+        self.assertNotEqual(SudokuGenerator(seed=43).create_puzzle('hard'), first)
+        dlx = SudokuGenerator(backend='dlx', seed=7)
+        self.assertEqual(SudokuGenerator(backend='dlx', seed=7).create_puzzle('easy'),
+                         dlx.create_puzzle('easy'))
+
+        puzzle_id = make_puzzle_id(42, 'hard')
+        self.assertEqual(len(puzzle_id), 8)
+        self.assertEqual(parse_puzzle_id(puzzle_id.hex()), (42, 'hard', 3, False))
+        self.assertEqual(puzzle_from_id(puzzle_id), first)
+        self.assertEqual(parse_puzzle_id(make_puzzle_id(5, 'easy', box=4, rated=True)),
+                         (5, 'easy', 4, True))
+        with self.assertRaises(ValueError):
+            parse_puzzle_id(bytes(8))
+
+    def test_dlx_backend(self):
+        """Тест решателя на танцующих ссылках"""
+        generator = SudokuGenerator(backend='dlx')
+        puzzle, solution = generator.create_puzzle('medium')
+        self.assertTrue(generator.has_unique_solution([row[:] for row in puzzle]))
+        self.assertEqual(list(generator.iter_solutions(puzzle)), [solution])
+
+        empty = [[0 for _ in range(9)] for _ in range(9)]
+        count = [0]
+        generator.count_solutions(empty, count, limit=5)
+        self.assertEqual(count[0], 5)
+        self.assertEqual(empty, [[0 for _ in range(9)] for _ in range(9)])
+
+    def test_generate_batch(self):
+        """Тест пакетной генерации в пуле процессов"""
+        results = list(generate_batch(4, 'easy', workers=2))
+        self.assertEqual(len(results), 4)
+        for puzzle, solution in results:
+            self.assertTrue(self.generator.has_unique_solution(puzzle))
+        # Процессы пула засеяны независимо
+        self.assertGreater(len({str(solution) for _, solution in results}), 1)
+
+        # С зерном партия с вариантами не зависит от порядка завершения задач
+        batches = [{str(puzzle) for puzzle, _ in generate_batch(10, 'easy', workers=2,
+                                                               variants=2, seed=1)}
+                   for _ in range(2)]
+        self.assertEqual(len(batches[0]), 10)
+        self.assertEqual(batches[0], batches[1])
+
+        # Ошибка в аргументах видна при вызове, а не при первом next()
+        with self.assertRaises(ValueError):
+            generate_batch(3, 'bogus')
+        with self.assertRaises(ValueError):
+            generate_batch(3, 'easy', variants=0)
+
+    def test_dig_budget(self):
+        """Тест ограничения времени и отчета о подсказках"""
+        puzzle, _ = self.generator.create_puzzle('hard', node_limit=200)
+        report = self.generator.last_report
+        self.assertTrue(report.budget_exhausted)
+        self.assertEqual(report.target_clues, 21)
+        self.assertEqual(report.clues, sum(1 for row in puzzle for cell in row if cell))
+        self.assertTrue(self.generator.has_unique_solution(puzzle))
+
+        with self.assertRaises(ValueError):
+            self.generator.create_puzzle('impossible')
+
+    def test_parallel_checks(self):
+        """Тест проверок единственности в пуле: результат как без пула"""
+        serial = SudokuGenerator(seed=11)
+        # На одном ядре пул не используется; проверяем сам проход с пулом
+        with SudokuGenerator(seed=11, check_workers=2) as parallel, \
+                patch('generator._available_cpus', return_value=2):
+            for difficulty in ('easy', 'hard', 'hard'):
+                self.assertEqual(parallel.create_puzzle(difficulty),
+                                 serial.create_puzzle(difficulty))
+                self.assertEqual(parallel.last_report.checks, serial.last_report.checks)
+            self.assertEqual(parallel.create_minimal_puzzle(24),
+                             serial.create_minimal_puzzle(24))
+        self.assertIsNone(parallel._checker)
+
+        # Ответ пула, полученный на снимке, когда было убрано 2 клетки и
+        # предсказано удаление клетки 5
+        self.assertTrue(_check_still_valid((False, 0, 2, (5,)), [1, 3, 5]))
+        self.assertFalse(_check_still_valid((False, 0, 2, (5,)), [1, 3, 5, 7]))
+        self.assertFalse(_check_still_valid((False, 0, 2, (5,)), [1, 3]))
+        self.assertTrue(_check_still_valid((True, 0, 2, (5,)), [1, 3, 5, 7]))
+        self.assertFalse(_check_still_valid((True, 0, 2, (5,)), [1, 3, 7]))
+
+        # Незакрытый генератор останавливает пул, когда его собирают
+        generator = SudokuGenerator(check_workers=2)
+        pool = generator._check_pool()
+        del generator
+        gc.collect()
+        with self.assertRaises(RuntimeError):
+            pool.submit(os.getpid)
+
+    def test_minimal_puzzle(self):
+        """Тест минимальных головоломок"""
+        generator = SudokuGenerator(seed=5)
+        puzzle, solution = generator.create_minimal_puzzle(22, time_limit=20)
+        report = generator.last_report
+        self.assertTrue(report.reached_target)
+        self.assertEqual(sum(num != 0 for row in puzzle for num in row), report.clues)
+        self.assertTrue(generator.is_minimal(puzzle))
+        for i in range(9):
+            for j in range(9):
+                if puzzle[i][j]:
+                    self.assertEqual(puzzle[i][j], solution[i][j])
+
+        # Бюджет не мешает минимальности: прерванный поиск отбрасывается
+        puzzle, _ = generator.create_minimal_puzzle(17, time_limit=0.2)
+        self.assertFalse(generator.last_report.reached_target)
+        self.assertTrue(generator.is_minimal(puzzle))
+
+        self.assertFalse(generator.is_minimal(solution))
+
+    def test_generator_stats(self):
+        """Тест необязательной статистики генератора"""
+        self.assertIsNone(self.generator.get_stats())
+
+        events = []
+        generator = SudokuGenerator(on_stats=events.append)
+        generator.create_puzzle('medium')
+        generator.create_puzzle('easy')
+        self.assertEqual(len(events), 2)
+        event = events[1]
+        self.assertEqual(event['difficulty'], 'easy')
+        self.assertEqual(event['puzzles'], 1)
+        self.assertEqual(event['uniqueness_checks'], generator.last_report.checks)
+        self.assertEqual(event['uniqueness_rejected'], generator.last_report.rejected)
+        self.assertGreater(event['nodes'], 0)
+
+        stats = generator.get_stats()
+        self.assertEqual(stats['puzzles'], 2)
+        self.assertEqual(stats['nodes'], generator.nodes)
+        self.assertGreater(stats['validity_checks'], 0)
+        self.assertGreater(stats['dig_time'], 0)
+
+    def test_symmetry_variants(self):
+        """Тест размножения головоломки преобразованиями симметрии"""
+        pairs = list(self.generator.create_puzzle_variants('easy', count=20))
+        self.assertEqual(len(pairs), 20)
+        self.assertEqual(len({str(puzzle) for puzzle, _ in pairs}), 20)
+        for puzzle, solution in pairs[1:4]:
+            self.assertEqual(list(self.generator.iter_solutions(puzzle)), [solution])
+
+        board = self.generator.generate_full_board()
+        self.assertEqual(SudokuTransform.identity().apply(board), board)
+
+    def test_canonical_form(self):
+        """Тест канонической формы относительно симметрий"""
+        puzzle, _ = self.generator.create_puzzle('easy')
+        key = canonical_key(puzzle)
+        for _ in range(3):
+            self.assertEqual(canonical_key(SudokuTransform.random().apply(puzzle)), key)
+
+        other, _ = self.generator.create_puzzle('easy')
+        self.assertNotEqual(canonical_key(other), key)
+
+    def test_dedup_index(self):
+        """Тест индекса дубликатов на диске"""
+        puzzles = [self.generator.create_puzzle('easy')[0] for _ in range(12)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'puzzles.idx')
+            with DedupIndex(path, capacity=8) as index:
+                for puzzle in puzzles:
+                    self.assertTrue(index.add(puzzle))
+                self.assertFalse(index.add(SudokuTransform.random().apply(puzzles[0])))
+                self.assertGreater(index.capacity, 8)
+
+            with DedupIndex(path) as index:
+                self.assertEqual(len(index), 12)
+                self.assertIn(puzzles[-1], index)
+
+    def test_packed_board(self):
+        """Тест компактного представления доски"""
+        puzzle, _ = self.generator.create_puzzle('easy')
+        board = Board.from_lists(puzzle)
+        self.assertEqual(board.to_lists(), puzzle)
+        self.assertEqual(Board.from_string(board.to_string()), board)
+        self.assertEqual(len(board.to_string()), 81)
+
+        copy = board.copy()
+        copy[0, 0] = 0 if board[0, 0] else 5
+        self.assertNotEqual(copy, board)
+        self.assertEqual(Board.from_string('.' * 81).count_empty(), 81)
+
+        with self.assertRaises(ValueError):
+            Board.from_string('12')
+
+    def test_prefetcher(self):
+        """Тест фоновой генерации с очередью"""
+        prefetcher = PuzzlePrefetcher(size=1)
+        try:
+            pair = prefetcher.take('hard')
+            deadline = time.monotonic() + 30
+            while pair is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+                pair = prefetcher.take('hard')
+            self.assertIsNotNone(pair)
+            puzzle, solution = pair
+            self.assertEqual(list(self.generator.iter_solutions(puzzle)), [solution])
+
+            # Очереди пополняются до заданного размера
+            deadline = time.monotonic() + 30
+            while prefetcher.available('easy') < 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(prefetcher.available('easy'), 1)
+        finally:
+            prefetcher.stop()
+
+    def test_rating(self):
+        """Тест оценки сложности по приемам решения"""
+        puzzle, _ = self.generator.create_puzzle('easy')
+        rating = rate_puzzle(puzzle)
+        self.assertTrue(rating.solved)
+        self.assertGreater(sum(rating.histogram.values()), 0)
+
+        # Для X-wing нужна головоломка, не решаемая более простыми приемами
+        x_wing = Board.from_string('892004050600010000007830002000006204000000510'
+                                   '000100308000000070100050000004003000')
+        rating = rate_puzzle(x_wing.to_lists())
+        self.assertTrue(rating.solved)
+        self.assertIn('x_wing', rating.histogram)
+
+        puzzle, _ = self.generator.create_rated_puzzle('medium')
+        self.assertGreaterEqual(self.generator.last_rating.rating, 2.3)
+
+    def test_puzzle_bank(self):
+        """Тест банка головоломок"""
+        puzzle, solution = self.generator.create_puzzle('easy')
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'puzzles.bank')
+            with PuzzleBank(path) as bank:
+                self.assertIsNone(bank.draw('easy'))
+                bank.append(puzzle, solution, 'easy', 1.5)
+                bank.append(Board.from_lists(solution), solution, 'hard', 3.2)
+                record = bank.draw('easy')
+                self.assertEqual(record.puzzle.to_lists(), puzzle)
+                self.assertEqual(record.solution.to_lists(), solution)
+                self.assertEqual(record.rating, 1.5)
+
+            with PuzzleBank(path) as bank:
+                self.assertEqual(len(bank), 2)
+                self.assertEqual(bank.count('hard'), 1)
+                self.assertIsNone(bank.draw('medium'))
+                self.assertEqual(bank.draw('hard').difficulty, 'hard')
+
+    @unittest.skipUnless(np is not None, "нужен numpy")
+    def test_batch_validator(self):
+        """Тест пакетной проверки досок"""
+        puzzle, solution = self.generator.create_puzzle('easy')
+        broken = [row[:] for row in solution]
+        broken[8][8] = broken[8][0]
+        boards = np.array([puzzle, solution, broken], dtype=np.uint8)
+        valid, complete = validate_boards(boards, chunk=2)
+        self.assertEqual(valid.tolist(), [True, True, False])
+        self.assertEqual(complete.tolist(), [False, True, False])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'puzzles.bank')
+            with PuzzleBank(path) as bank:
+                bank.append(puzzle, solution, 'easy')
+                bank.append(puzzle, broken, 'easy')
+            report = audit_bank(path)
+        self.assertEqual(report['records'], 2)
+        self.assertEqual(report['invalid_solutions'], 1)
+        self.assertEqual(report['bad_records'], [1])
+
+    def test_board_model(self):
+        """Тест модели поля и отметок изменившихся клеток"""
+        puzzle, solution = self.generator.create_puzzle('easy')
+        model = BoardModel()
+        model.load(Board.from_lists(puzzle), Board.from_lists(solution))
+        self.assertEqual(len(model.take_dirty()), 81)
+
+        given = next((i, j) for i in range(9) for j in range(9) if puzzle[i][j])
+        self.assertFalse(model.set_value(*given, 1))
+        self.assertEqual(model.take_dirty(), set())
+
+        row, col = next((i, j) for i in range(9) for j in range(9) if not puzzle[i][j])
+        model.select((row, col))
+        wrong = solution[row][col] % 9 + 1
+        self.assertTrue(model.set_value(row, col, wrong))
+        self.assertEqual(model.take_dirty(), {row * 9 + col} | model.conflicts)
+        self.assertEqual(model.values[row, col], wrong)
+
+        conflicts = set(model.conflicts)
+        model.set_value(row, col, solution[row][col])
+        self.assertEqual(model.style(row, col), 'selected')
+        self.assertEqual(model.take_dirty(), {row * 9 + col} | conflicts)
+
+        model.clear_user_input()
+        self.assertEqual(model.values, model.givens)
+        self.assertEqual(model.take_dirty(), {row * 9 + col})
+
+    def test_live_conflicts(self):
+        """Тест отслеживания конфликтов при вводе"""
+        model = BoardModel()
+        model.load(Board.from_string('5' + '0' * 80), Board())
+        model.take_dirty()
+
+        model.set_value(0, 8, 5)
+        self.assertEqual(model.conflicts, {0, 8})
+        self.assertEqual(model.style(0, 0), 'error')
+        self.assertEqual(model.mistakes, 1)
+        model.set_value(8, 8, 5)
+        self.assertEqual(model.conflicts, {0, 8, 80})
+        model.set_value(0, 8, 3)
+        self.assertEqual(model.conflicts, set())
+        self.assertEqual(model.take_dirty(), {0, 8, 80})
+        model.set_value(1, 7, 3)
+        self.assertEqual(model.conflict_count, 2)
+
+        model.clear_user_input()
+        self.assertEqual(model.conflict_count, 0)
+        self.assertEqual(model.empty, 80)
+
+        puzzle, solution = self.generator.create_puzzle('easy')
+        model.load(Board.from_lists(puzzle), Board.from_lists(solution))
+        for i in range(9):
+            for j in range(9):
+                model.set_value(i, j, solution[i][j])
+        self.assertTrue(model.solved)
+
+    def test_puzzle_server(self):
+        """Тест HTTP-сервера головоломок"""
+        async def request(port, method, path, body=None):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            data = json.dumps(body).encode() if body is not None else b''
+            writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(data)}\r\n"
+                         f"Connection: close\r\n\r\n".encode() + data)
+            response = await reader.read()
+            writer.close()
+            head, _, payload = response.partition(b'\r\n\r\n')
+            return int(head.split()[1]), json.loads(payload)
+
+        async def scenario():
+            server = PuzzleServer({'easy': 2, 'medium': 1, 'hard': 1}, workers=1,
+                                  wait_timeout=30)
+            await server.start(port=0)
+            try:
+                status, item = await request(server.port, 'GET', '/puzzle?difficulty=easy')
+                self.assertEqual(status, 200)
+                self.assertEqual(len(item['puzzle']), 81)
+
+                status, solved = await request(server.port, 'POST', '/solve',
+                                               {'puzzle': item['puzzle']})
+                self.assertEqual(solved, {'solution': item['solution'], 'unique': True})
+                status, valid = await request(server.port, 'POST', '/validate',
+                                              {'board': item['solution']})
+                self.assertEqual(valid, {'valid': True, 'complete': True})
+
+                status, _ = await request(server.port, 'GET', '/puzzle?difficulty=x')
+                self.assertEqual(status, 400)
+                status, stats = await request(server.port, 'GET', '/stats')
+                self.assertEqual(stats['hits'] + stats['misses'], 1)
+                self.assertIsNotNone(stats['latency_ms']['p50'])
+
+                # Строка запроса и заголовок длиннее буфера потока
+                status, _ = await request(server.port, 'GET', '/stats?x=' + 'x' * 70000)
+                self.assertEqual(status, 414)
+                reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+                writer.write(b"GET /stats HTTP/1.1\r\nX-Long: " + b'x' * 70000 + b"\r\n\r\n")
+                response = await reader.read()
+                writer.close()
+                self.assertTrue(response.startswith(b"HTTP/1.1 400 "))
+
+                server.solve_timeout = 0
+                status, _ = await request(server.port, 'POST', '/solve',
+                                          {'puzzle': item['puzzle']})
+                self.assertEqual(status, 503)
+            finally:
+                await server.stop()
+
+        asyncio.run(scenario())
+
+    def test_server_refill_errors(self):
+        """Тест сервера: ошибка генерации не останавливает пополнение пулов"""
+        async def scenario():
+            server = PuzzleServer({'easy': 1, 'medium': 1, 'hard': 1}, workers=1)
+            await server.start(port=0)
+            try:
+                deadline = time.monotonic() + 30
+                while (server.counters['generation_errors'] < 6 and
+                       time.monotonic() < deadline):
+                    await asyncio.sleep(0.01)
+                self.assertGreaterEqual(server.counters['generation_errors'], 6)
+                self.assertFalse(any(task.done() for task in server._fillers))
+            finally:
+                await server.stop()
+
+        with patch('server._generate', _failing_generate), \
+                patch('server.REFILL_BACKOFF', 0.001), \
+                self.assertLogs('server', 'ERROR'):
+            asyncio.run(scenario())
+
+    def test_solve_stream(self):
+        """Тест потокового решения головоломок"""
+        puzzle, solution = self.generator.create_puzzle('easy')
+        text = Board.from_lists(puzzle).to_string()
+        lines = [text + '\n', '\n', '# комментарий\n', '0' * 81, '11' + '0' * 79,
+                 'не доска', '1000' + '0' * 12, text]
+        results = list(solve_stream(lines, workers=1, batch=2, window=2))
+        self.assertEqual([r.line for r in results], [1, 4, 5, 6, 7, 8])
+        self.assertEqual([r.solutions for r in results], [1, 2, 0, 0, 2, 1])
+        self.assertEqual(results[0].solution, Board.from_lists(solution).to_string())
+        self.assertIsNotNone(results[3].error)
+
+        summary = SolveSummary()
+        for result in results:
+            summary.add(result)
+        report = summary.as_dict()
+        self.assertEqual((report['unique'], report['multiple'], report['no_solution'],
+                          report['invalid']), (2, 2, 1, 1))
+
+    def test_bench_helpers(self):
+        """Тест перцентилей и сравнения с базовыми замерами"""
+        samples = [i / 100 for i in range(1, 101)]
+        self.assertEqual(percentile(samples, 50), 0.5)
+        self.assertEqual(percentile(samples, 99), 0.99)
+
+        baseline = {'results': {'solve': {'p50_ms': 10.0}}}
+        self.assertEqual(compare({'solve': {'p50_ms': 11.0}}, baseline, 20), [])
+        self.assertEqual(len(compare({'solve': {'p50_ms': 13.0}}, baseline, 20)), 1)
+
+        # Замеры с другими параметрами генератора не сравниваются
+        options = {'backend': 'backtracking', 'search': 'mrv', 'check_workers': 1}
+        baseline['options'] = options
+        self.assertEqual(compare({'solve': {'p50_ms': 11.0}}, baseline, 20, options), [])
+        with self.assertRaises(ValueError):
+            compare({'solve': {'p50_ms': 11.0}}, baseline, 20, {**options, 'search': 'linear'})
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
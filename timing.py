@@ -0,0 +1,5 @@
+def percentile(samples, q):
+    """Перцентиль q (0..100) по методу ближайшего ранга"""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
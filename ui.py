@@ -1,11 +1,20 @@
+import sys
+import time
 import tkinter as tk
 from tkinter import messagebox
 
+from board import ALPHABET
+from model import BoardModel
+
+
+# Шрифт клеток по размеру квадрата: большие доски рисуются мельче
+CELL_FONT_SIZES = {2: 24, 3: 18, 4: 12, 5: 9}
+
 
 class SudokuUI:
     """Пользовательский интерфейс для Судоку"""
 
-    def __init__(self, root):
+    def __init__(self, root, model=None):
         self.root = root
         self.root.title("Судоку")
         self.root.geometry("600x700")
@@ -18,10 +27,21 @@ class SudokuUI:
         self.error_color = "#ffcccc"
 
         # Инициализация
-        self.cells = [[None for _ in range(9)] for _ in range(9)]
-        self.selected_cell = None
+        self.model = model or BoardModel()
+        # Вызывается после каждого изменения числа в клетке
+        self.on_change = None
+        self.cells = []
+        # Что сейчас нарисовано в каждой клетке: (текст, фон, цвет текста)
+        self._drawn = []
+        self.box = None
 
         self.setup_ui()
+        self.render()
+
+    @property
+    def selected_cell(self):
+        """Выделенная клетка (row, col) или None"""
+        return self.model.selected
 
     def setup_ui(self):
         """Настройка интерфейса"""
@@ -70,79 +90,125 @@ class SudokuUI:
         tk.Label(numbers_frame, text="Выберите число:",
                  bg=self.bg_color, font=("Arial", 10)).pack()
 
-        numbers_buttons = tk.Frame(numbers_frame, bg=self.bg_color)
-        numbers_buttons.pack(pady=5)
-
-        for i in range(1, 10):
-            btn = tk.Button(numbers_buttons, text=str(i), width=3,
-                            command=lambda num=i: self.on_number_click(num),
+        self.numbers_buttons = tk.Frame(numbers_frame, bg=self.bg_color)
+        self.numbers_buttons.pack(pady=5)
+        self.create_number_buttons()
+
+    def create_number_buttons(self):
+        """Кнопки чисел 1..size (числа больше 9 - буквы, как в строке доски)"""
+        for widget in self.numbers_buttons.winfo_children():
+            widget.destroy()
+        size = self.model.size
+        per_row = size if size <= 9 else 2 * self.model.shape.box
+        for num in range(1, size + 1):
+            btn = tk.Button(self.numbers_buttons, text=chr(ALPHABET[num]), width=3,
+                            command=lambda num=num: self.on_number_click(num),
                             bg="#607D8B", fg="white", font=("Arial", 12))
-            btn.pack(side=tk.LEFT, padx=2)
+            btn.grid(row=(num - 1) // per_row, column=(num - 1) % per_row,
+                     padx=2, pady=2)
 
     def create_grid(self):
-        """Создание сетки 9x9"""
-        for i in range(9):
-            for j in range(9):
-                # Определяем цвет фона
-                bg_color = self.cell_color
-                if (i // 3 + j // 3) % 2 == 0:
-                    bg_color = "#f5f5f5"
-
+        """Создание сетки size x size под размер доски модели"""
+        for row in self.cells:
+            for cell in row:
+                cell.destroy()
+        shape = self.model.shape
+        size, box = shape.size, shape.box
+        self.box = box
+        self.cells = [[None] * size for _ in range(size)]
+        self._drawn = [None] * shape.cells
+        font = ("Arial", CELL_FONT_SIZES[box], "bold")
+        for i in range(size):
+            for j in range(size):
                 # Создаем Entry
-                cell = tk.Entry(self.board_frame, width=3,
-                                font=("Arial", 18, "bold"),
-                                justify='center', bg=bg_color,
+                cell = tk.Entry(self.board_frame, width=2 if box > 3 else 3,
+                                font=font,
+                                justify='center', bg=self.normal_color(i, j),
                                 relief=tk.SOLID, borderwidth=1)
                 cell.grid(row=i, column=j,
-                          padx=(1 if j % 3 != 0 else 3),
-                          pady=(1 if i % 3 != 0 else 3))
+                          padx=(1 if j % box != 0 else 3),
+                          pady=(1 if i % box != 0 else 3))
 
-                # Привязываем события
+                # Привязываем события. Без класса Entry виджет сам не
+                # редактирует текст: ввод идет только через модель
+                cell.bindtags((str(cell), str(cell.winfo_toplevel()), 'all'))
                 cell.bind("<Button-1>", lambda e, row=i, col=j: self.cell_clicked(row, col))
                 cell.bind("<FocusIn>", lambda e, row=i, col=j: self.cell_clicked(row, col))
 
                 self.cells[i][j] = cell
 
+    def normal_color(self, row, col):
+        """Фон обычной клетки (квадраты чередуются)"""
+        box = self.model.shape.box
+        if (row // box + col // box) % 2 == 0:
+            return "#f5f5f5"
+        return self.cell_color
+
+    def _look(self, row, col):
+        """Текст и цвета клетки по состоянию модели"""
+        num = self.model.values[row, col]
+        text = chr(ALPHABET[num]) if num else ""
+        style = self.model.style(row, col)
+        if style == 'given':
+            return text, self.fixed_color, "black"
+        if style == 'solved':
+            return text, self.fixed_color, "green"
+        if style == 'error':
+            fg = "black" if self.model.is_given(row, col) else "blue"
+            return text, self.error_color, fg
+        if style == 'selected':
+            return text, self.selected_color, "blue"
+        return text, self.normal_color(row, col), "blue"
+
+    def render(self):
+        """Перерисовывает только клетки, изменившиеся в модели"""
+        if self.model.shape.box != self.box:
+            # Модель загрузила доску другого размера - строим сетку заново
+            self.create_grid()
+            self.create_number_buttons()
+            self.root.geometry("")
+        for index in self.model.take_dirty():
+            row, col = divmod(index, self.model.size)
+            look = self._look(row, col)
+            drawn = self._drawn[index]
+            if look != drawn:
+                self._draw_cell(row, col, look, drawn)
+                self._drawn[index] = look
+
+    def _draw_cell(self, row, col, look, drawn):
+        """Переносит вид клетки на экран (drawn - прежний вид или None)"""
+        cell = self.cells[row][col]
+        if drawn is None or drawn[0] != look[0]:
+            cell.delete(0, tk.END)
+            cell.insert(0, look[0])
+        if drawn is None or drawn[1:] != look[1:]:
+            cell.config(bg=look[1], fg=look[2])
+
+    def select(self, cell):
+        """Выделяет клетку (row, col) или снимает выделение (None)"""
+        self.model.select(cell)
+        self.render()
+
     def cell_clicked(self, row, col):
         """Обработка клика по ячейке"""
-        if self.selected_cell:
-            old_row, old_col = self.selected_cell
-            old_bg = self.cells[old_row][old_col].cget('bg')
-            if old_bg != self.fixed_color and old_bg != self.error_color:
-                normal_bg = self.cell_color
-                if (old_row // 3 + old_col // 3) % 2 == 0:
-                    normal_bg = "#f5f5f5"
-                self.cells[old_row][old_col].config(bg=normal_bg)
-
-        self.selected_cell = (row, col)
-        current_bg = self.cells[row][col].cget('bg')
-        if current_bg != self.fixed_color and current_bg != self.error_color:
-            self.cells[row][col].config(bg=self.selected_color)
-
+        self.select((row, col))
         self.cells[row][col].focus_set()
 
+    def set_number(self, row, col, number):
+        """Ставит число игрока в клетку (0 - очистить)"""
+        if not self.model.set_value(row, col, number):
+            messagebox.showwarning("Внимание", "Это число нельзя изменить!")
+            return False
+        self.render()
+        if self.on_change is not None:
+            self.on_change()
+        return True
 
     def on_number_click(self, number):
         """Обработка нажатия цифры"""
         if self.selected_cell:
             row, col = self.selected_cell
-            cell = self.cells[row][col]
-
-            # Проверяем, можно ли редактировать
-            current_value = cell.get()
-            if cell.cget('bg') == self.fixed_color:
-                messagebox.showwarning("Внимание", "Это число нельзя изменить!")
-                return
-
-            # Вставляем число
-            cell.delete(0, tk.END)
-            cell.insert(0, str(number))
-
-            # Сбрасываем цвет ошибки
-            normal_bg = self.cell_color
-            if (row // 3 + col // 3) % 2 == 0:
-                normal_bg = "#f5f5f5"
-            cell.config(bg=normal_bg)
+            self.set_number(row, col, number)
 
     def on_new_game(self):
         """Новая игра"""
@@ -155,10 +221,7 @@ class SudokuUI:
 
     def on_clear(self):
         """Очистка доски"""
-        for i in range(9):
-            for j in range(9):
-                if self.cells[i][j].cget('bg') != self.fixed_color:
-                    self.cells[i][j].delete(0, tk.END)
+        self.clear_board()
 
     def on_help(self):
         """Справка"""
@@ -177,14 +240,8 @@ class SudokuUI:
 
     def clear_board(self):
         """Очистка всех изменяемых ячеек"""
-        for i in range(9):
-            for j in range(9):
-                if self.cells[i][j].cget('bg') != self.fixed_color:
-                    self.cells[i][j].delete(0, tk.END)
-                    normal_bg = self.cell_color
-                    if (i // 3 + j // 3) % 2 == 0:
-                        normal_bg = "#f5f5f5"
-                    self.cells[i][j].config(bg=normal_bg)
+        self.model.clear_user_input()
+        self.render()
 
     def set_cell_state(self, row, col, state):
         """Устанавливает состояние ячейки"""
@@ -195,7 +252,108 @@ class SudokuUI:
             cell.config(state='normal')
 
 
-if __name__ == "__main__":
+class CanvasSudokuUI(SudokuUI):
+    """Интерфейс, рисующий поле на одном холсте вместо виджетов Entry.
+
+    Клетка - прямоугольник и текст на tk.Canvas. Клик обрабатывает один
+    обработчик холста, который переводит координаты в клетку, а render()
+    меняет только свойства элементов изменившихся клеток: Tk
+    перерисовывает холст один раз, когда очередь событий опустеет.
+    """
+
+    # Сторона клетки в пикселях по размеру квадрата
+    CELL_PIXELS = {2: 70, 3: 50, 4: 34, 5: 26}
+    # Отступ от края холста до сетки
+    MARGIN = 3
+
+    def __init__(self, root, model=None):
+        self.canvas = None
+        super().__init__(root, model)
+
+    def create_grid(self):
+        """Создание холста с сеткой size x size под размер доски модели"""
+        if self.canvas is not None:
+            self.canvas.destroy()
+        shape = self.model.shape
+        size, box = shape.size, shape.box
+        self.box = box
+        self.cell_pixels = step = self.CELL_PIXELS[box]
+        margin = self.MARGIN
+        side = size * step + 2 * margin
+        self.canvas = canvas = tk.Canvas(self.board_frame, width=side, height=side,
+                                         bg="black", highlightthickness=0)
+        canvas.pack()
+        self._drawn = [None] * shape.cells
+        font = ("Arial", CELL_FONT_SIZES[box], "bold")
+
+        # cells[i][j] - пара номеров элементов холста: фон и текст
+        self.cells = [[None] * size for _ in range(size)]
+        for i in range(size):
+            for j in range(size):
+                x, y = margin + j * step, margin + i * step
+                rect = canvas.create_rectangle(x, y, x + step, y + step,
+                                               fill=self.normal_color(i, j),
+                                               outline="#999999")
+                text = canvas.create_text(x + step / 2, y + step / 2, text="",
+                                          font=font, fill="blue")
+                self.cells[i][j] = (rect, text)
+        # Толстые линии между квадратами поверх клеток
+        for k in range(0, size + 1, box):
+            pos = margin + k * step
+            canvas.create_line(margin, pos, side - margin, pos, width=3)
+            canvas.create_line(pos, margin, pos, side - margin, width=3)
+
+        canvas.bind("<Button-1>", self._canvas_clicked)
+
+    def _canvas_clicked(self, event):
+        """Один обработчик кликов для всего поля"""
+        col = (event.x - self.MARGIN) // self.cell_pixels
+        row = (event.y - self.MARGIN) // self.cell_pixels
+        if 0 <= row < self.model.size and 0 <= col < self.model.size:
+            self.cell_clicked(row, col)
+
+    def _draw_cell(self, row, col, look, drawn):
+        rect, text = self.cells[row][col]
+        if drawn is None or drawn[0] != look[0] or drawn[2] != look[2]:
+            self.canvas.itemconfigure(text, text=look[0], fill=look[2])
+        if drawn is None or drawn[1] != look[1]:
+            self.canvas.itemconfigure(rect, fill=look[1])
+
+    def cell_clicked(self, row, col):
+        """Обработка клика по ячейке"""
+        self.select((row, col))
+        self.canvas.focus_set()
+
+    def set_cell_state(self, row, col, state):
+        """У клеток холста нет своего состояния: подсказки защищает модель"""
+
+
+def measure(ui_class, actions=200):
+    """Время построения окна и средняя задержка перерисовки на действие, с"""
     root = tk.Tk()
-    app = SudokuUI(root)
-    root.mainloop()
\ No newline at end of file
+    try:
+        start = time.perf_counter()
+        ui = ui_class(root)
+        root.update()
+        build = time.perf_counter() - start
+
+        size = ui.model.size
+        start = time.perf_counter()
+        for i in range(actions):
+            ui.select(divmod(i * 7 % (size * size), size))
+            root.update_idletasks()
+        return build, (time.perf_counter() - start) / actions
+    finally:
+        root.destroy()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ['--measure']:
+        for ui_class in (SudokuUI, CanvasSudokuUI):
+            build, action = measure(ui_class)
+            print(f"{ui_class.__name__}: окно {build * 1000:.1f} мс, "
+                  f"действие {action * 1000:.3f} мс")
+    else:
+        root = tk.Tk()
+        app = CanvasSudokuUI(root)
+        root.mainloop()
\ No newline at end of file
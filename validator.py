@@ -0,0 +1,143 @@
+import argparse
+import sys
+
+from bank import HEADER, MAGIC, RECORD, VERSION
+from generator import DIFFICULTIES
+
+try:
+    import numpy as np
+except ImportError:
+    # numpy нужен только для пакетной проверки
+    np = None
+
+
+# Досок за один проход: one-hot массив блока занимает CHUNK * 729 байт
+# и помещается в кэш процессора
+CHUNK = 4096
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Для пакетной проверки нужен numpy: pip install numpy")
+
+
+def validate_boards(boards, chunk=CHUNK):
+    """Проверяет сразу много досок 9x9.
+
+    boards - массив (N, 9, 9) из uint8 (0 - пустая клетка). Возвращает
+    два булевых массива длины N: valid (нет конфликтов и чисел больше 9)
+    и complete (доска к тому же заполнена). Числа каждой цифры в строках,
+    столбцах и квадратах считаются суммами one-hot массива, без циклов
+    Python по клеткам; доски обрабатываются блоками по chunk штук.
+    """
+    _require_numpy()
+    boards = np.asarray(boards, dtype=np.uint8)
+    if boards.ndim != 3 or boards.shape[1:] != (9, 9):
+        raise ValueError(f"Ожидался массив (N, 9, 9), получено {boards.shape}")
+    count = len(boards)
+    valid = np.empty(count, dtype=bool)
+    complete = np.empty(count, dtype=bool)
+    digits = np.arange(1, 10, dtype=np.uint8)
+
+    for start in range(0, count, chunk):
+        part = boards[start:start + chunk]
+        size = len(part)
+        # onehot[b, r, c, d] = 1 - в клетке (r, c) доски b стоит цифра d + 1
+        onehot = (part[..., None] == digits).view(np.uint8)
+        # Суммы складываются срезами: так заметно быстрее, чем sum по оси
+        rows = onehot[:, :, 0].copy()
+        cols = onehot[:, 0].copy()
+        for i in range(1, 9):
+            rows += onehot[:, :, i]
+            cols += onehot[:, i]
+        # Оси после reshape: доска, строка квадрата, строка в квадрате,
+        # столбец квадрата, столбец в квадрате, цифра
+        by_box = onehot.reshape(size, 3, 3, 3, 3, 9)
+        boxes = np.zeros((size, 3, 3, 9), dtype=np.uint8)
+        for i in range(3):
+            for j in range(3):
+                boxes += by_box[:, :, i, :, j]
+
+        counts = np.maximum(rows.reshape(size, -1), cols.reshape(size, -1))
+        np.maximum(counts, boxes.reshape(size, -1), out=counts)
+        ok = counts.max(axis=1, initial=0) <= 1
+        ok &= part.reshape(size, -1).max(axis=1, initial=0) <= 9
+        valid[start:start + chunk] = ok
+        complete[start:start + chunk] = ok & part.reshape(size, -1).all(axis=1)
+    return valid, complete
+
+
+def _unpack(packed):
+    """Доски (N, 9, 9) из упакованных полубайтов (N, 41), см. Board.to_packed"""
+    cells = np.empty((len(packed), 82), dtype=np.uint8)
+    cells[:, 0::2] = packed >> 4
+    cells[:, 1::2] = packed & 0x0F
+    return cells[:, :81].reshape(-1, 9, 9)
+
+
+def bank_boards(path):
+    """Головоломки, решения и номера сложностей банка массивами numpy.
+
+    Файл отображается в память (np.memmap), а записи распаковываются
+    целиком, без разбора каждой записи в Python.
+    """
+    _require_numpy()
+    with open(path, 'rb') as f:
+        magic, version, record_size, count = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"Файл не является банком головоломок: {path}")
+    if count == 0:
+        empty = np.zeros((0, 9, 9), dtype=np.uint8)
+        return empty, empty.copy(), np.zeros(0, dtype=np.uint8)
+    records = np.memmap(path, dtype=np.uint8, mode='r', offset=HEADER.size,
+                        shape=(count, RECORD.size))
+    # Поля записи: головоломка (41 байт), решение (41 байт), сложность
+    return _unpack(records[:, :41]), _unpack(records[:, 41:82]), np.array(records[:, 82])
+
+
+def audit_bank(path):
+    """Проверка банка головоломок: сколько записей с какими ошибками.
+
+    Головоломка должна быть без конфликтов, решение - заполненным без
+    конфликтов, а подсказки головоломки - совпадать с решением.
+    В 'bad_records' - номера всех ошибочных записей.
+    """
+    puzzles, solutions, difficulties = bank_boards(path)
+    puzzle_ok, _ = validate_boards(puzzles)
+    _, solution_ok = validate_boards(solutions)
+    matches = ~((puzzles != 0) & (puzzles != solutions)).any(axis=(1, 2))
+    known = difficulties < len(DIFFICULTIES)
+    good = puzzle_ok & solution_ok & matches & known
+    return {
+        'records': len(puzzles),
+        'invalid_puzzles': int((~puzzle_ok).sum()),
+        'invalid_solutions': int((~solution_ok).sum()),
+        'mismatched': int((~matches).sum()),
+        'unknown_difficulty': int((~known).sum()),
+        'bad_records': np.flatnonzero(~good).tolist(),
+    }
+
+
+def main(argv=None):
+    """Проверка банков: python validator.py puzzles.bank [...]"""
+    parser = argparse.ArgumentParser(description="Пакетная проверка банков головоломок")
+    parser.add_argument('paths', nargs='+', metavar='PATH', help="файлы банков")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for path in args.paths:
+        report = audit_bank(path)
+        bad = report['bad_records']
+        print(f"{path}: записей {report['records']}, "
+              f"головоломок с конфликтами {report['invalid_puzzles']}, "
+              f"неверных решений {report['invalid_solutions']}, "
+              f"расхождений с решением {report['mismatched']}, "
+              f"неизвестных сложностей {report['unknown_difficulty']}")
+        if bad:
+            failed = True
+            print(f"  ошибочные записи: {bad[:20]}{' ...' if len(bad) > 20 else ''}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())